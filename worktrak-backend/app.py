@@ -1,11 +1,27 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context, g, has_request_context
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity, get_jwt
 from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.http import quote_etag
 from datetime import datetime, timedelta
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+import click
+import hashlib
+import json
+import math
+import multiprocessing
 import os
+import queue
+import re
+import threading
+import time
+from collections import OrderedDict
 from dotenv import load_dotenv
+import numpy as np
+from sqlalchemy import and_, or_, func, inspect, event, table, column, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from goaltracker import GoalTracker, GOAL_PERIODS, period_window
 
 load_dotenv()
 
@@ -17,9 +33,235 @@ app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///wor
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['JWT_SECRET_KEY'] = os.getenv('SECRET_KEY', 'super-secret-key')
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(days=30)  # 30 days instead of 15 minutes
+
+# DATABASE_MODE=production tunes SQLite for several gunicorn workers writing at once:
+# WAL lets readers proceed during a write, and the busy timeout makes writers queue
+# for the lock instead of failing with "database is locked"
+app.config['DATABASE_MODE'] = os.getenv('DATABASE_MODE', 'development')
+app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 30000))
+# Coalesce concurrent /log inserts into one transaction per window; 0 disables
+app.config['GROUP_COMMIT_WINDOW_MS'] = int(os.getenv('GROUP_COMMIT_WINDOW_MS', 0))
+app.config['GROUP_COMMIT_MAX_BATCH'] = int(os.getenv('GROUP_COMMIT_MAX_BATCH', 200))
+# Seconds a /log request waits for its group commit before failing
+app.config['GROUP_COMMIT_TIMEOUT'] = float(os.getenv('GROUP_COMMIT_TIMEOUT', 30))
+
+if app.config['DATABASE_MODE'] == 'production':
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': 30,
+        'pool_pre_ping': True,
+        'connect_args': {
+            'timeout': app.config['SQLITE_BUSY_TIMEOUT_MS'] / 1000,
+            'check_same_thread': False
+        }
+    }
+
+# Password hashing runs in a process pool so scrypt does not tie up request workers.
+# PASSWORD_HASH_METHOD must be fully specified (e.g. scrypt:N:r:p or pbkdf2:sha256:iterations)
+# because stored hashes are rehashed on login whenever their method string differs.
+app.config['PASSWORD_HASH_METHOD'] = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+app.config['HASH_POOL_WORKERS'] = int(os.getenv('HASH_POOL_WORKERS', min(2, os.cpu_count() or 1)))
+# Hashes admitted at once per worker process. Each admitted login holds a request
+# thread while it waits, so this must stay below gunicorn's --threads to leave
+# threads for other traffic; by default only as many as the pool can run at once.
+app.config['HASH_QUEUE_LIMIT'] = int(os.getenv('HASH_QUEUE_LIMIT', max(app.config['HASH_POOL_WORKERS'], 1)))
+app.config['HASH_RETRY_AFTER'] = int(os.getenv('HASH_RETRY_AFTER', 2))
+
+# Requests and SQL statements slower than these are logged as warnings; 0 disables
+app.config['SLOW_REQUEST_MS'] = int(os.getenv('SLOW_REQUEST_MS', 500))
+app.config['SLOW_QUERY_MS'] = int(os.getenv('SLOW_QUERY_MS', 100))
+
+# Memory budget for the per-worker analytics time-series cache
+app.config['ANALYTICS_CACHE_BYTES'] = int(os.getenv('ANALYTICS_CACHE_BYTES', 64 * 1024 * 1024))
+
 jwt = JWTManager(app)
 db = SQLAlchemy(app)
 
+def current_user_id():
+    """The authenticated user's id. Tokens carry it as a string subject, as PyJWT requires."""
+    return int(get_jwt_identity())
+
+def configure_sqlite_connection(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute(f"PRAGMA busy_timeout={app.config['SQLITE_BUSY_TIMEOUT_MS']}")
+    cursor.close()
+
+if app.config['DATABASE_MODE'] == 'production':
+    with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            event.listen(db.engine, 'connect', configure_sqlite_connection)
+
+class Histogram:
+    """Labelled cumulative histogram rendered in Prometheus text format."""
+
+    def __init__(self, name, help_text, buckets, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.label_names = label_names
+        self.series = {}  # labels -> [bucket counts..., sum, count]
+
+    def observe(self, labels, value):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self, const_labels=()):
+        """Render every series; const_labels are (name, value) pairs added to each one."""
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for labels, series in sorted(self.series.items()):
+            pairs = [*const_labels, *zip(self.label_names, labels)]
+            base = ','.join(f'{key}="{escape_label(value)}"' for key, value in pairs)
+            prefix = base + ',' if base else ''
+            for bound, count in zip(self.buckets, series):
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {series[-1]}')
+            suffix = f'{{{base}}}' if base else ''
+            lines.append(f'{self.name}_sum{suffix} {series[-2]}')
+            lines.append(f'{self.name}_count{suffix} {series[-1]}')
+        return lines
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class Metrics:
+    """In-process request and SQL metrics. Each gunicorn worker keeps its own.
+
+    Every series carries a pid label, so the counters a scrape reaches in one
+    worker are never mistaken for a reset of another's. Aggregate with
+    sum without (pid) (...) after rate().
+    """
+
+    LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+    STATEMENT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+    SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = {}
+        self.request_duration = Histogram(
+            'worktrak_request_duration_seconds', 'Request latency by endpoint.',
+            self.LATENCY_BUCKETS, ('endpoint', 'method'))
+        self.request_statements = Histogram(
+            'worktrak_request_sql_statements', 'SQL statements executed per request.',
+            self.STATEMENT_BUCKETS, ('endpoint', 'method'))
+        self.request_sql_time = Histogram(
+            'worktrak_request_sql_seconds', 'Time spent in SQL per request.',
+            self.LATENCY_BUCKETS, ('endpoint', 'method'))
+        self.response_size = Histogram(
+            'worktrak_response_size_bytes', 'Response payload size (streamed responses excluded).',
+            self.SIZE_BUCKETS, ('endpoint', 'method'))
+        self.query_duration = Histogram(
+            'worktrak_sql_query_duration_seconds', 'Latency of individual SQL statements.',
+            self.LATENCY_BUCKETS, ())
+
+    def record_request(self, endpoint, method, status, duration, statements, sql_time, size):
+        labels = (endpoint, method)
+        with self.lock:
+            key = (endpoint, method, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.request_duration.observe(labels, duration)
+            self.request_statements.observe(labels, statements)
+            self.request_sql_time.observe(labels, sql_time)
+            if size is not None:
+                self.response_size.observe(labels, size)
+
+    def record_query(self, duration):
+        with self.lock:
+            self.query_duration.observe((), duration)
+
+    def render(self):
+        # Read at render time: gunicorn forks workers after this object is created
+        pid = os.getpid()
+        with self.lock:
+            lines = ['# HELP worktrak_requests_total Requests by endpoint and status.',
+                     '# TYPE worktrak_requests_total counter']
+            for (endpoint, method, status), count in sorted(self.requests.items()):
+                lines.append(
+                    f'worktrak_requests_total{{pid="{pid}",endpoint="{escape_label(endpoint)}",'
+                    f'method="{method}",status="{status}"}} {count}'
+                )
+            for histogram in (self.request_duration, self.request_statements, self.request_sql_time,
+                              self.response_size, self.query_duration):
+                lines.extend(histogram.render(const_labels=(('pid', pid),)))
+        return '\n'.join(lines) + '\n'
+
+metrics = Metrics()
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start'].pop()
+    metrics.record_query(elapsed)
+    if has_request_context() and 'sql_statements' in g:
+        g.sql_statements += 1
+        g.sql_time += elapsed
+    slow_ms = app.config['SLOW_QUERY_MS']
+    if slow_ms and elapsed * 1000 >= slow_ms:
+        app.logger.warning('Slow query (%.1f ms): %s', elapsed * 1000, statement)
+
+with app.app_context():
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    event.listen(db.engine, 'after_cursor_execute', after_cursor_execute)
+
+class HashingOverloaded(Exception):
+    """Raised when the password hashing queue is full."""
+
+class PasswordHasher:
+    """Bounded process pool for password hashing with admission control.
+
+    At most `queue_limit` hashes may be running or waiting at once per worker
+    process; beyond that, calls fail fast with HashingOverloaded so the caller
+    can answer 503 rather than stacking up requests behind scrypt.
+    With workers=0 hashing runs inline.
+    """
+
+    def __init__(self, workers, queue_limit):
+        self.workers = workers
+        self.slots = threading.BoundedSemaphore(queue_limit)
+        self.lock = threading.Lock()
+        self.pool = None
+        self.pid = None
+
+    def _get_pool(self):
+        # A pool inherited across gunicorn's fork is unusable, so build one per process.
+        # Its workers come from a forkserver rather than forking this multi-threaded
+        # process, which may hold locks owned by request or group-commit threads.
+        with self.lock:
+            if self.pool is None or self.pid != os.getpid():
+                self.pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('forkserver')
+                )
+                self.pid = os.getpid()
+            return self.pool
+
+    def run(self, fn, *args, **kwargs):
+        if not self.slots.acquire(blocking=False):
+            raise HashingOverloaded()
+        try:
+            if not self.workers:
+                return fn(*args, **kwargs)
+            return self._get_pool().submit(fn, *args, **kwargs).result()
+        finally:
+            self.slots.release()
+
+password_hasher = PasswordHasher(app.config['HASH_POOL_WORKERS'], app.config['HASH_QUEUE_LIMIT'])
+
+def overloaded_response():
+    return jsonify({'error': 'Server busy, please retry shortly'}), 503, {
+        'Retry-After': str(app.config['HASH_RETRY_AFTER'])
+    }
+
 # User model
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -28,10 +270,15 @@ class User(db.Model):
     activities = db.relationship('Activity', backref='user', lazy=True)
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.run(
+            generate_password_hash, password, method=app.config['PASSWORD_HASH_METHOD']
+        )
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.run(check_password_hash, self.password_hash, password)
+
+    def needs_rehash(self):
+        return self.password_hash.split('$', 1)[0] != app.config['PASSWORD_HASH_METHOD']
 
     def to_dict(self):
         return {
@@ -49,6 +296,13 @@ class Activity(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
 
+    # Covers the per-user (date, id) ordering used by keyset pagination on /logs,
+    # and the (user_id, id) range scanned by /logs/changes
+    __table_args__ = (
+        db.Index('ix_activity_user_date_id', 'user_id', 'date', 'id'),
+        db.Index('ix_activity_user_id', 'user_id', 'id'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -60,9 +314,759 @@ class Activity(db.Model):
             'user_id': self.user_id
         }
 
+# Per-user daily totals by category, kept in step with Activity by every write path
+class DailyRollup(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    category = db.Column(db.String(50), primary_key=True)
+    total_minutes = db.Column(db.Integer, nullable=False, default=0)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+def update_rollup(user_id, records, sign=1):
+    """Add (or with sign=-1 subtract) activity fields to the rollup. Caller commits."""
+    deltas = {}
+    for record in records:
+        key = (record['date'], record['category'])
+        minutes, count = deltas.get(key, (0, 0))
+        deltas[key] = (minutes + sign * record['minutes'], count + sign)
+
+    if not deltas:
+        return
+
+    stmt = sqlite_insert(DailyRollup.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id', 'date', 'category'],
+        set_={
+            'total_minutes': DailyRollup.__table__.c.total_minutes + stmt.excluded.total_minutes,
+            'count': DailyRollup.__table__.c.count + stmt.excluded.count
+        }
+    )
+    db.session.execute(stmt, [
+        {'user_id': user_id, 'date': date, 'category': category,
+         'total_minutes': minutes, 'count': count}
+        for (date, category), (minutes, count) in deltas.items()
+    ])
+
+# Per-user write counter; bumped in the same transaction as every activity insert
+class ChangeSequence(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    seq = db.Column(db.Integer, nullable=False, default=0)
+
+def bump_change_seq(user_id):
+    """Increment the user's change sequence and return its new value. Caller commits."""
+    stmt = sqlite_insert(ChangeSequence.__table__).values(user_id=user_id, seq=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id'],
+        set_={'seq': ChangeSequence.__table__.c.seq + 1}
+    ).returning(ChangeSequence.__table__.c.seq)
+    return db.session.execute(stmt).scalar_one()
+
+def change_etag(user_id, *parts):
+    """Strong ETag for the current request's representation of the user's data."""
+    seq = db.session.execute(
+        db.select(ChangeSequence.seq).filter_by(user_id=user_id)
+    ).scalar() or 0
+    key = '|'.join([str(user_id), str(seq), request.full_path, *parts])
+    return f"{seq}-{hashlib.sha1(key.encode()).hexdigest()[:16]}"
+
+def etag_headers(etag):
+    return {'ETag': quote_etag(etag), 'Cache-Control': 'private, no-cache'}
+
+# Goal model
+class Goal(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    name = db.Column(db.String(100), nullable=False)
+    target_minutes = db.Column(db.Integer, nullable=False)
+    period = db.Column(db.String(10), nullable=False)
+    start_date = db.Column(db.Date)
+    end_date = db.Column(db.Date)
+    categories = db.Column(db.Text)  # JSON list; empty matches every category
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def category_list(self):
+        return json.loads(self.categories) if self.categories else []
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'target_minutes': self.target_minutes,
+            'period': self.period,
+            'start_date': self.start_date.isoformat() if self.start_date else None,
+            'end_date': self.end_date.isoformat() if self.end_date else None,
+            'categories': self.category_list(),
+            'created_at': self.created_at.isoformat()
+        }
+
+# Running total of a goal for one window (the week, month or custom range it covers)
+class GoalProgress(db.Model):
+    goal_id = db.Column(db.Integer, db.ForeignKey('goal.id'), primary_key=True)
+    window_start = db.Column(db.Date, primary_key=True)
+    minutes = db.Column(db.Integer, nullable=False, default=0)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+def apply_goal_increments(totals, sign=1):
+    if not totals:
+        return
+    stmt = sqlite_insert(GoalProgress.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['goal_id', 'window_start'],
+        set_={
+            'minutes': GoalProgress.__table__.c.minutes + stmt.excluded.minutes,
+            'count': GoalProgress.__table__.c.count + stmt.excluded.count
+        }
+    )
+    db.session.execute(stmt, [
+        {'goal_id': goal_id, 'window_start': window_start,
+         'minutes': sign * minutes, 'count': sign * count}
+        for (goal_id, window_start), (minutes, count) in totals.items()
+    ])
+
+def update_goal_progress(user_id, records, sign=1):
+    """Add activity fields to the running totals of the user's matching goals. Caller commits."""
+    goals = Goal.query.filter_by(user_id=user_id).all()
+    if goals:
+        apply_goal_increments(GoalTracker(goals).increments(records), sign)
+
+def backfill_goal_progress(goal):
+    """Seed a new goal's totals from the daily rollup rather than raw activities."""
+    query = DailyRollup.query.filter(DailyRollup.user_id == goal.user_id, DailyRollup.count > 0)
+    if goal.category_list():
+        query = query.filter(DailyRollup.category.in_(goal.category_list()))
+    if goal.period == 'custom':
+        query = query.filter(DailyRollup.date >= goal.start_date, DailyRollup.date <= goal.end_date)
+    records = [
+        {'date': row.date, 'category': row.category, 'minutes': row.total_minutes, 'count': row.count}
+        for row in query
+    ]
+    apply_goal_increments(GoalTracker([goal]).increments(records))
+
+def goal_progress(goal, day):
+    """Progress of a goal for the window containing day: a single primary-key lookup."""
+    window = period_window(goal.period, day, goal.start_date, goal.end_date)
+    if window is None:
+        # Custom goals report their own range even when day falls outside it
+        window = (goal.start_date, goal.end_date)
+    progress = db.session.get(GoalProgress, (goal.id, window[0]))
+    minutes = progress.minutes if progress else 0
+    return {
+        'goal_id': goal.id,
+        'window_start': window[0].isoformat(),
+        'window_end': window[1].isoformat(),
+        'minutes': minutes,
+        'count': progress.count if progress else 0,
+        'target_minutes': goal.target_minutes,
+        'remaining_minutes': max(goal.target_minutes - minutes, 0),
+        'percent': round(100 * minutes / goal.target_minutes, 1),
+        'completed': minutes >= goal.target_minutes
+    }
+
+def rebuild_rollups():
+    """Recompute the whole rollup table from Activity in a single transaction."""
+    db.session.query(DailyRollup).delete()
+    db.session.execute(DailyRollup.__table__.insert().from_select(
+        ['user_id', 'date', 'category', 'total_minutes', 'count'],
+        db.select(
+            Activity.user_id, Activity.date, Activity.category,
+            func.sum(Activity.minutes), func.count(Activity.id)
+        ).group_by(Activity.user_id, Activity.date, Activity.category)
+    ))
+    # Stats may have changed for anyone, so invalidate every user's ETags and
+    # analytics cache entries (in all workers) by advancing their change sequence
+    db.session.execute(text(
+        'INSERT INTO change_sequence (user_id, seq) SELECT id, 1 FROM user WHERE true '
+        'ON CONFLICT (user_id) DO UPDATE SET seq = seq + 1'
+    ))
+    db.session.commit()
+
+# Full-text index over activity titles and categories. It is an external-content
+# FTS5 table, so it stores only the index and triggers keep it in step with activity.
+# user_id is indexed as a token so every search is scoped with user_id:N inside FTS5
+# itself, rather than ranking all users' matches and filtering afterwards.
+activity_fts = table('activity_fts', column('rowid'), column('rank'), column('activity_fts'))
+
+SEARCH_INDEX_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS activity_fts USING fts5(
+        title, category, user_id,
+        content='activity', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS activity_fts_ai AFTER INSERT ON activity BEGIN
+        INSERT INTO activity_fts(rowid, title, category, user_id)
+        VALUES (new.id, new.title, new.category, new.user_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS activity_fts_ad AFTER DELETE ON activity BEGIN
+        INSERT INTO activity_fts(activity_fts, rowid, title, category, user_id)
+        VALUES ('delete', old.id, old.title, old.category, old.user_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS activity_fts_au AFTER UPDATE ON activity BEGIN
+        INSERT INTO activity_fts(activity_fts, rowid, title, category, user_id)
+        VALUES ('delete', old.id, old.title, old.category, old.user_id);
+        INSERT INTO activity_fts(rowid, title, category, user_id)
+        VALUES (new.id, new.title, new.category, new.user_id);
+    END""",
+]
+
+SEARCH_INDEX_TRIGGERS = ('activity_fts_ai', 'activity_fts_ad', 'activity_fts_au')
+
+def search_index_outdated():
+    """True if the FTS table is missing or predates the user_id column."""
+    if not inspect(db.engine).has_table('activity_fts'):
+        return True
+    columns = db.session.execute(text('PRAGMA table_info(activity_fts)')).all()
+    return 'user_id' not in {row[1] for row in columns}
+
+def rebuild_search_index():
+    """Recreate the FTS5 table and triggers and reindex every activity."""
+    for trigger in SEARCH_INDEX_TRIGGERS:
+        db.session.execute(text(f'DROP TRIGGER IF EXISTS {trigger}'))
+    db.session.execute(text('DROP TABLE IF EXISTS activity_fts'))
+    for statement in SEARCH_INDEX_DDL:
+        db.session.execute(text(statement))
+    db.session.execute(text("INSERT INTO activity_fts(activity_fts) VALUES ('rebuild')"))
+    db.session.commit()
+
 # Create database tables
 with app.app_context():
+    rollup_exists = inspect(db.engine).has_table(DailyRollup.__tablename__)
     db.create_all()
+    # create_all() skips indexes on tables that already exist, so add them explicitly
+    for index in Activity.__table__.indexes:
+        index.create(db.engine, checkfirst=True)
+    # Backfill the rollup the first time it is created on an existing database
+    if not rollup_exists:
+        rebuild_rollups()
+    # Build (or upgrade) the search index for databases created before it existed
+    if search_index_outdated():
+        rebuild_search_index()
+
+# Pagination settings for /logs
+MAX_PAGE_SIZE = 500
+STREAM_BATCH_SIZE = 1000
+
+def encode_cursor(activity):
+    return f"{activity.date.isoformat()}_{activity.id}"
+
+def decode_cursor(cursor):
+    date_str, _, id_str = cursor.partition('_')
+    return datetime.strptime(date_str, '%Y-%m-%d').date(), int(id_str)
+
+def parse_limit(limit):
+    """Clamp a ?limit= value to MAX_PAGE_SIZE; raises ValueError if it is not positive."""
+    limit = int(limit) if limit is not None else MAX_PAGE_SIZE
+    if limit <= 0:
+        raise ValueError(limit)
+    return min(limit, MAX_PAGE_SIZE)
+
+# Search settings for /logs?q=
+MAX_SEARCH_TERMS = 10
+
+def build_fts_query(search, user_id):
+    """Turn free text into a user-scoped FTS5 query matching every term.
+
+    Only the last term matches as a prefix (search-as-you-type): FTS5 has to merge
+    the index-wide doclists of every term a prefix covers, while whole terms can
+    be intersected with the user's rows directly.
+    """
+    terms = re.findall(r'\w+', search)[:MAX_SEARCH_TERMS]
+    if not terms:
+        return None
+    matched = ' '.join([f'"{term}"' for term in terms[:-1]] + [f'"{terms[-1]}"*'])
+    return f'user_id:"{int(user_id)}" AND {{title category}}: ({matched})'
+
+def encode_search_cursor(rank, activity):
+    return f"{rank!r}_{activity.id}"
+
+def decode_search_cursor(cursor):
+    rank_str, _, id_str = cursor.rpartition('_')
+    rank = float(rank_str)
+    if not math.isfinite(rank):
+        raise ValueError(cursor)
+    return rank, int(id_str)
+
+# Bucket start for each /stats granularity
+STATS_GRANULARITIES = {
+    'day': lambda day: day,
+    'week': lambda day: day - timedelta(days=day.weekday()),
+    'month': lambda day: day.replace(day=1)
+}
+
+def query_rollup(user_id, start, end, category=None):
+    query = DailyRollup.query.filter(
+        DailyRollup.user_id == user_id,
+        DailyRollup.date >= start,
+        DailyRollup.date <= end,
+        DailyRollup.count > 0
+    )
+    if category and category != 'All':
+        query = query.filter_by(category=category)
+    return query.order_by(DailyRollup.date).all()
+
+class AnalyticsCache:
+    """LRU cache of each user's daily minutes as a (day x category) NumPy array.
+
+    Entries are built lazily from DailyRollup and tagged with the user's change
+    sequence. A write applies its rows in place only if the entry was tagged
+    with the sequence just before its own; otherwise the entry may already
+    include the rows (rebuilt after the commit) or miss another worker's write,
+    so it is dropped. A read that finds the tag behind the database rebuilds
+    the entry instead of serving stale data.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def get(self, user_id):
+        user_id = int(user_id)
+        seq = db.session.execute(
+            db.select(ChangeSequence.seq).filter_by(user_id=user_id)
+        ).scalar() or 0
+
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is not None and entry['seq'] == seq:
+                self.entries.move_to_end(user_id)
+                return entry
+
+        entry = self._build(user_id, seq)
+        with self.lock:
+            self._store(user_id, entry)
+        return entry
+
+    def record(self, user_id, records, seq):
+        """Apply activity fields committed as change sequence `seq` to a cached entry in place."""
+        user_id = int(user_id)
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None:
+                return
+            if entry['seq'] != seq - 1:
+                self._discard(user_id)
+                return
+            for record in records:
+                day = (record['date'] - entry['origin']).days
+                if day < 0:
+                    self._discard(user_id)
+                    return
+                if day >= entry['minutes'].shape[0]:
+                    self._grow(entry, rows=day + 1)
+                if record['category'] not in entry['columns']:
+                    entry['columns'][record['category']] = len(entry['categories'])
+                    entry['categories'].append(record['category'])
+                    self._grow(entry, cols=len(entry['categories']))
+                entry['minutes'][day, entry['columns'][record['category']]] += record['minutes']
+            entry['seq'] = seq
+            self._store(user_id, entry)
+
+    def invalidate(self, user_id):
+        with self.lock:
+            self._discard(int(user_id))
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def _build(self, user_id, seq):
+        rows = DailyRollup.query.filter(
+            DailyRollup.user_id == user_id,
+            DailyRollup.count > 0
+        ).all()
+
+        today = datetime.now().date()
+        origin = min((row.date for row in rows), default=today)
+        days = (max([today] + [row.date for row in rows]) - origin).days + 1
+        categories = sorted({row.category for row in rows})
+        columns = {category: i for i, category in enumerate(categories)}
+
+        minutes = np.zeros((days, len(categories)), dtype=np.int32)
+        if rows:
+            day_index = np.array([(row.date - origin).days for row in rows])
+            col_index = np.array([columns[row.category] for row in rows])
+            np.add.at(minutes, (day_index, col_index), [row.total_minutes for row in rows])
+
+        return {
+            'origin': origin,
+            'categories': categories,
+            'columns': columns,
+            'minutes': minutes,
+            'seq': seq
+        }
+
+    def _grow(self, entry, rows=None, cols=None):
+        old = entry['minutes']
+        grown = np.zeros((rows or old.shape[0], cols or old.shape[1]), dtype=old.dtype)
+        grown[:old.shape[0], :old.shape[1]] = old
+        entry['minutes'] = grown
+
+    def _store(self, user_id, entry):
+        self._discard(user_id)
+        self.entries[user_id] = entry
+        self.size += entry['minutes'].nbytes
+        while self.size > self.max_bytes and len(self.entries) > 1:
+            self._discard(next(iter(self.entries)))
+
+    def _discard(self, user_id):
+        entry = self.entries.pop(user_id, None)
+        if entry is not None:
+            self.size -= entry['minutes'].nbytes
+
+analytics_cache = AnalyticsCache(app.config['ANALYTICS_CACHE_BYTES'])
+
+ROLLING_WINDOWS = (7, 30)
+
+def align_days(minutes, origin, first, length):
+    """Slice `length` days starting at `first` out of a cached array, zero-filling days it lacks."""
+    aligned = np.zeros((length, minutes.shape[1]), dtype=np.int64)
+    lo = max((first - origin).days, 0)
+    hi = min((first - origin).days + length, minutes.shape[0])
+    if hi > lo:
+        offset = (origin - first).days + lo
+        aligned[offset:offset + hi - lo] = minutes[lo:hi]
+    return aligned
+
+def compute_analytics(entry, year, today):
+    """Derive the year-in-review metrics from a cached entry in one vectorized pass."""
+    origin = entry['origin']
+    start = datetime(year, 1, 1).date()
+    end = min(datetime(year, 12, 31).date(), today)
+    length = max((end - start).days + 1, 0)
+
+    # Rolling averages look back into the days before January 1
+    lookback = ROLLING_WINDOWS[-1] - 1
+    minutes = entry['minutes']
+    extended = align_days(minutes, origin, start - timedelta(days=lookback), length + lookback)
+    window = extended[lookback:]
+    daily = window.sum(axis=1)
+
+    # Streaks are measured over all history up to today. The cached array may end
+    # before today (no writes since it was built), so pad it out with empty days.
+    history = align_days(minutes, origin, origin, max((today - origin).days + 1, 0)).sum(axis=1) > 0
+    edges = np.diff(np.concatenate(([0], history.astype(np.int8), [0])))
+    run_starts = np.flatnonzero(edges == 1)
+    run_lengths = np.flatnonzero(edges == -1) - run_starts
+    longest_streak = int(run_lengths.max()) if run_lengths.size else 0
+    current_streak = 0
+    if run_lengths.size:
+        last_end = run_starts[-1] + run_lengths[-1]
+        # A streak is still current if it reaches today or yesterday
+        if last_end >= len(history) - 1:
+            current_streak = int(run_lengths[-1])
+
+    cumulative = np.concatenate(([0], np.cumsum(extended.sum(axis=1))))
+    def rolling_average(days):
+        idx = np.arange(lookback + 1, lookback + length + 1)
+        return np.round((cumulative[idx] - cumulative[idx - days]) / days, 2)
+
+    days = np.datetime64(start, 'D') + np.arange(length)
+    months = days.astype('datetime64[M]').astype(np.int64) % 12
+    monthly = np.zeros((12, window.shape[1]), dtype=np.int64)
+    np.add.at(monthly, months, window)
+
+    return {
+        'year': year,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'daily_minutes': daily.tolist(),
+        'total_minutes': int(daily.sum()),
+        'active_days': int((daily > 0).sum()),
+        'current_streak': current_streak,
+        'longest_streak': longest_streak,
+        **{
+            f'rolling_{days}_day_average': rolling_average(days).tolist()
+            for days in ROLLING_WINDOWS
+        },
+        'category_trends': {
+            category: {
+                'monthly_minutes': monthly[:, i].tolist(),
+                'total_minutes': int(monthly[:, i].sum())
+            }
+            for i, category in enumerate(entry['categories'])
+            if monthly[:, i].any()
+        }
+    }
+
+# Bulk ingest settings for /log/batch and the import-logs command
+BATCH_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+def validate_activity(data):
+    """Validate an activity payload, returning (fields, None) or (None, error)."""
+    if not isinstance(data, dict):
+        return None, 'Invalid record'
+
+    title = data.get('title') or ''
+    category = data.get('category')
+    minutes = data.get('minutes')
+    date_str = data.get('date')
+
+    if not isinstance(title, str) or not title.strip():
+        return None, 'Title is required'
+    if len(title.strip()) > 200:
+        return None, 'Title must be at most 200 characters'
+    if not isinstance(category, str) or not category.strip():
+        return None, 'Category is required'
+    if len(category) > 50:
+        return None, 'Category must be at most 50 characters'
+    try:
+        if not minutes or not isinstance(minutes, (int, str)) or int(minutes) <= 0:
+            return None, 'Valid minutes required'
+    except ValueError:
+        return None, 'Valid minutes required'
+    if not date_str:
+        return None, 'Date is required'
+
+    try:
+        minutes = int(minutes)
+        date = datetime.strptime(date_str, '%Y-%m-%d').date()
+    except (ValueError, TypeError):
+        return None, 'Invalid date or minutes format'
+
+    return {
+        'title': title.strip(),
+        'category': category,
+        'minutes': minutes,
+        'date': date
+    }, None
+
+def insert_activities(user_id, records):
+    """Insert validated activity fields in one executemany. Caller commits."""
+    if not records:
+        return
+    db.session.execute(
+        Activity.__table__.insert(),
+        [dict(record, user_id=user_id, created_at=datetime.utcnow()) for record in records]
+    )
+    update_rollup(user_id, records)
+    update_goal_progress(user_id, records)
+    bump_change_seq(user_id)
+
+class IngestError(Exception):
+    """A chunk failed to commit; earlier chunks stay committed."""
+
+    def __init__(self, inserted, errors, error_count):
+        super().__init__(f'Ingest failed after {inserted} rows')
+        self.inserted = inserted
+        self.errors = errors
+        self.error_count = error_count
+
+def ingest_activities(user_id, records, chunk_size=BATCH_CHUNK_SIZE):
+    """Validate and insert (line_no, data) pairs in chunked transactions.
+
+    Records are consumed lazily so the input is never held in memory as a whole.
+    Returns (inserted, errors, error_count): errors lists the first
+    MAX_REPORTED_ERRORS validation failures and error_count counts all of them.
+    Raises IngestError, carrying the rows already committed, if a chunk fails.
+    """
+    inserted = 0
+    errors = []
+    error_count = 0
+    chunk = []
+
+    def flush():
+        nonlocal inserted
+        try:
+            insert_activities(user_id, chunk)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise IngestError(inserted, errors, error_count) from e
+        inserted += len(chunk)
+
+    try:
+        for line_no, data in records:
+            fields, error = validate_activity(data)
+            if error:
+                error_count += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({'line': line_no, 'error': error})
+                continue
+
+            chunk.append(fields)
+            if len(chunk) >= chunk_size:
+                flush()
+                chunk = []
+
+        if chunk:
+            flush()
+    finally:
+        if inserted:
+            analytics_cache.invalidate(user_id)
+
+    return inserted, errors, error_count
+
+def iter_ndjson(lines):
+    """Yield (line_no, record) for each non-blank NDJSON line; bad JSON yields None."""
+    for line_no, line in enumerate(lines, start=1):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', errors='replace')
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except ValueError:
+            yield line_no, None
+
+def parse_legacy_line(line):
+    """Parse a log_data.txt line: 'YYYY-MM-DD | Category | [Title |] N minutes|hours'."""
+    parts = [part.strip() for part in line.split('|')]
+    if len(parts) == 3:
+        date_str, category, duration = parts
+        title = category
+    elif len(parts) == 4:
+        date_str, category, title, duration = parts
+    else:
+        return None
+
+    amount, _, unit = duration.partition(' ')
+    unit = unit.strip().lower()
+    try:
+        amount = float(amount)
+    except ValueError:
+        return None
+    if unit in ('hour', 'hours'):
+        minutes = round(amount * 60)
+    elif unit in ('minute', 'minutes'):
+        minutes = round(amount)
+    else:
+        return None
+
+    return {'title': title, 'category': category, 'minutes': minutes, 'date': date_str}
+
+class GroupCommitWriter:
+    """Background writer that commits concurrent /log inserts together.
+
+    Request threads submit validated fields and block until the batch holding
+    their row commits. The writer waits up to `window` seconds after the first
+    row for others to arrive, so N concurrent requests cost one transaction
+    (one fsync, one lock acquisition) instead of N. Rows coalesce within a
+    worker process, so run gunicorn with threads for this to pay off.
+    """
+
+    def __init__(self, app, window, max_batch, timeout):
+        self.app = app
+        self.window = window
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.pid = None
+
+    def submit(self, user_id, fields):
+        """Queue one activity and return its to_dict() once committed.
+
+        Raises concurrent.futures.TimeoutError if no commit happens in time; the
+        row is then withdrawn, so a client retry cannot create a duplicate.
+        """
+        self._ensure_started()
+        future = Future()
+        self.queue.put((user_id, fields, future))
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            if future.cancel():
+                raise
+            # The writer already took the row, so its outcome is imminent
+            return future.result()
+
+    def _ensure_started(self):
+        # Threads do not survive gunicorn's fork, so start one per worker process
+        with self.lock:
+            if self.pid != os.getpid():
+                self.queue = queue.Queue()
+                self.pid = os.getpid()
+                self.thread = None
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='group-commit', daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            # Skip rows whose request gave up waiting
+            batch = [item for item in batch if item[2].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                self._commit(batch)
+            except Exception as e:
+                # Never let the writer die with requests still waiting on it
+                self.app.logger.exception('Group commit failed')
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _commit(self, batch):
+        with self.app.app_context():
+            try:
+                results = self._write(batch)
+            except Exception as e:
+                db.session.rollback()
+                failure = e
+            else:
+                failure = None
+
+        if failure is None:
+            for (_, _, future), result in zip(batch, results):
+                future.set_result(result)
+        elif len(batch) == 1:
+            batch[0][2].set_exception(failure)
+        else:
+            # One bad row should not fail the requests it was batched with
+            for item in batch:
+                self._commit([item])
+
+    def _write(self, batch):
+        activities = []
+        by_user = {}
+        for user_id, fields, _ in batch:
+            activity = Activity(user_id=user_id, **fields)
+            db.session.add(activity)
+            activities.append(activity)
+            by_user.setdefault(user_id, []).append(fields)
+
+        seqs = {}
+        for user_id, records in by_user.items():
+            update_rollup(user_id, records)
+            update_goal_progress(user_id, records)
+            seqs[user_id] = bump_change_seq(user_id)
+
+        # Serialize after flush so ids are assigned without reloading after commit
+        db.session.flush()
+        results = [activity.to_dict() for activity in activities]
+        db.session.commit()
+
+        for user_id, records in by_user.items():
+            try:
+                analytics_cache.record(user_id, records, seqs[user_id])
+            except Exception:
+                self.app.logger.exception('Failed to update analytics cache')
+                analytics_cache.invalidate(user_id)
+        return results
+
+group_commit = None
+if app.config['GROUP_COMMIT_WINDOW_MS'] > 0:
+    group_commit = GroupCommitWriter(
+        app,
+        window=app.config['GROUP_COMMIT_WINDOW_MS'] / 1000,
+        max_batch=app.config['GROUP_COMMIT_MAX_BATCH'],
+        timeout=app.config['GROUP_COMMIT_TIMEOUT']
+    )
 
 # Error handlers
 @app.errorhandler(404)
@@ -74,6 +1078,37 @@ def internal_error(error):
     db.session.rollback()
     return jsonify({'error': 'Internal server error'}), 500
 
+# Per-request instrumentation
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    g.sql_statements = 0
+    g.sql_time = 0.0
+
+@app.after_request
+def record_request_metrics(response):
+    if 'request_start' not in g:
+        return response
+    duration = time.perf_counter() - g.request_start
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    metrics.record_request(
+        endpoint, request.method, response.status_code, duration,
+        g.sql_statements, g.sql_time,
+        None if response.is_streamed else response.calculate_content_length()
+    )
+    slow_ms = app.config['SLOW_REQUEST_MS']
+    if slow_ms and duration * 1000 >= slow_ms:
+        app.logger.warning(
+            'Slow request (%.1f ms, %d queries, %.1f ms SQL): %s %s',
+            duration * 1000, g.sql_statements, g.sql_time * 1000, request.method, request.full_path.rstrip('?')
+        )
+    return response
+
+# Prometheus metrics for this worker process
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 # Registration endpoint
 @app.route('/register', methods=['POST'])
 def register():
@@ -104,6 +1139,9 @@ def register():
         
         return jsonify({'message': 'User registered successfully'}), 201
         
+    except HashingOverloaded:
+        db.session.rollback()
+        return overloaded_response()
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Registration failed'}), 500
@@ -124,7 +1162,14 @@ def login():
             
         user = User.query.filter_by(username=username).first()
         if user and user.check_password(password):
-            access_token = create_access_token(identity=user.id)
+            # Upgrade hashes made with a different cost; skip quietly if hashing is saturated
+            if user.needs_rehash():
+                try:
+                    user.set_password(password)
+                    db.session.commit()
+                except HashingOverloaded:
+                    db.session.rollback()
+            access_token = create_access_token(identity=str(user.id))
             return jsonify({
                 'access_token': access_token, 
                 'user': user.to_dict(),
@@ -133,6 +1178,8 @@ def login():
         else:
             return jsonify({'error': 'Invalid username or password'}), 401
             
+    except HashingOverloaded:
+        return overloaded_response()
     except Exception as e:
         return jsonify({'error': 'Login failed'}), 500
 
@@ -141,58 +1188,96 @@ def login():
 @jwt_required()
 def log_work():
     try:
-        user_id = get_jwt_identity()
+        user_id = current_user_id()
         data = request.get_json()
         
         if not data:
             return jsonify({'error': 'No data provided'}), 400
             
-        title = data.get('title', '').strip()
-        category = data.get('category')
-        minutes = data.get('minutes')
-        date_str = data.get('date')
-
-        if not title:
-            return jsonify({'error': 'Title is required'}), 400
-        if not category:
-            return jsonify({'error': 'Category is required'}), 400
-        if not minutes or not isinstance(minutes, (int, str)) or int(minutes) <= 0:
-            return jsonify({'error': 'Valid minutes required'}), 400
-        if not date_str:
-            return jsonify({'error': 'Date is required'}), 400
+        fields, error = validate_activity(data)
+        if error:
+            return jsonify({'error': error}), 400
 
-        try:
-            minutes = int(minutes)
-            date = datetime.strptime(date_str, '%Y-%m-%d').date()
-        except (ValueError, TypeError):
-            return jsonify({'error': 'Invalid date or minutes format'}), 400
-
-        activity = Activity(
-            title=title,
-            category=category,
-            minutes=minutes,
-            date=date,
-            user_id=user_id
-        )
-        
-        db.session.add(activity)
-        db.session.commit()
+        if group_commit:
+            activity_dict = group_commit.submit(user_id, fields)
+        else:
+            activity = Activity(user_id=user_id, **fields)
+            
+            db.session.add(activity)
+            update_rollup(user_id, [fields])
+            update_goal_progress(user_id, [fields])
+            seq = bump_change_seq(user_id)
+            db.session.commit()
+            analytics_cache.record(user_id, [fields], seq)
+            activity_dict = activity.to_dict()
         
         return jsonify({
             'message': 'Activity logged successfully', 
-            'activity': activity.to_dict()
+            'activity': activity_dict
         }), 201
         
     except Exception as e:
         db.session.rollback()
+        app.logger.exception('Failed to log activity')
         return jsonify({'error': 'Failed to log activity'}), 500
 
+# Bulk log work (protected)
+# Accepts NDJSON (one activity per line, read incrementally from the request body)
+# or a JSON object of the form {"activities": [...]}
+@app.route('/log/batch', methods=['POST'])
+@jwt_required()
+def log_work_batch():
+    try:
+        user_id = current_user_id()
+
+        if request.mimetype == 'application/json':
+            data = request.get_json(silent=True)
+            if not isinstance(data, dict) or not isinstance(data.get('activities'), list):
+                return jsonify({'error': 'No data provided'}), 400
+            records = enumerate(data['activities'], start=1)
+        else:
+            records = iter_ndjson(request.stream)
+
+        inserted, errors, error_count = ingest_activities(user_id, records)
+
+        body = {
+            'message': f'{inserted} activities logged',
+            'inserted': inserted,
+            'errors': errors,
+            'error_count': error_count
+        }
+        if not inserted:
+            body['error'] = 'No valid activities provided'
+            return jsonify(body), 400
+        return jsonify(body), 201
+
+    except IngestError as e:
+        app.logger.exception('Failed to log activities')
+        return jsonify({
+            'error': 'Failed to log activities',
+            'inserted': e.inserted,
+            'errors': e.errors,
+            'error_count': e.error_count
+        }), 500
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to log activities'}), 500
+
 # Get logs (protected)
 @app.route('/logs', methods=['GET'])
 @jwt_required()
 def get_logs():
     try:
-        user_id = get_jwt_identity()
+        user_id = current_user_id()
+        search = request.args.get('q')
+        # bm25 ranks use index-wide statistics, so other users' writes reorder ranked
+        # results without moving this user's change sequence: no ETag for those
+        ranked_search = search is not None and request.args.get('sort') != 'date'
+        if not ranked_search:
+            etag = change_etag(user_id)
+            if request.if_none_match.contains(etag):
+                return '', 304, etag_headers(etag)
+
         category = request.args.get('category')
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
@@ -215,53 +1300,185 @@ def get_logs():
                 query = query.filter(Activity.date <= end_date_obj)
             except ValueError:
                 return jsonify({'error': 'Invalid end date format'}), 400
+
+        if search is not None:
+            fts_query = build_fts_query(search, user_id)
+            if not fts_query:
+                return jsonify({'error': 'Invalid search query'}), 400
+            fts_match = activity_fts.c.activity_fts.op('MATCH')(fts_query)
+            # sort=date pages matches with the stable (date, id) keyset below. The
+            # match runs once as a subquery so SQLite does not re-run it per row.
+            if ranked_search:
+                query = query.join(activity_fts, activity_fts.c.rowid == Activity.id).filter(fts_match)
+                return search_logs(query)
+            query = query.filter(Activity.id.in_(
+                db.select(activity_fts.c.rowid).where(fts_match)
+            ))
             
-        activities = query.order_by(Activity.date.desc()).all()
-        
+        query = query.order_by(Activity.date.desc(), Activity.id.desc())
+
+        # NDJSON streaming: rows are fetched in batches from a server-side cursor
+        if request.args.get('format') == 'ndjson':
+            def generate():
+                for activity in query.yield_per(STREAM_BATCH_SIZE):
+                    yield json.dumps(activity.to_dict()) + '\n'
+
+            return Response(
+                stream_with_context(generate()),
+                mimetype='application/x-ndjson',
+                headers=etag_headers(etag)
+            )
+
+        limit = request.args.get('limit')
+        cursor = request.args.get('cursor')
+
+        if limit is None and cursor is None:
+            activities = query.all()
+            return jsonify({
+                'logs': [activity.to_dict() for activity in activities]
+            }), 200, etag_headers(etag)
+
+        try:
+            limit = parse_limit(limit)
+        except ValueError:
+            return jsonify({'error': 'Invalid limit'}), 400
+
+        # Keyset pagination: continue strictly after the (date, id) of the last row seen
+        if cursor:
+            try:
+                cursor_date, cursor_id = decode_cursor(cursor)
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor'}), 400
+            query = query.filter(or_(
+                Activity.date < cursor_date,
+                and_(Activity.date == cursor_date, Activity.id < cursor_id)
+            ))
+
+        activities = query.limit(limit + 1).all()
+        has_more = len(activities) > limit
+        activities = activities[:limit]
+
         return jsonify({
-            'logs': [activity.to_dict() for activity in activities]
-        }), 200
+            'logs': [activity.to_dict() for activity in activities],
+            'next_cursor': encode_cursor(activities[-1]) if has_more else None
+        }), 200, etag_headers(etag)
         
     except Exception as e:
+        app.logger.exception('Failed to fetch logs')
         return jsonify({'error': 'Failed to fetch logs'}), 500
 
+def search_logs(query):
+    """Order an FTS-matched /logs query by bm25 relevance.
+
+    Supports the same ndjson, full-list and limit/cursor modes as get_logs;
+    pages are keyed on (rank, id) instead of (date, id). bm25 uses index-wide
+    statistics, so any write (by any user) can shift ranks between pages and a
+    rank cursor may then skip or repeat rows. For the same reason responses
+    carry no ETag. Clients that need an exact walk through all matches, or
+    revalidation, should use sort=date instead.
+    """
+    rank = activity_fts.c.rank
+    query = query.add_columns(rank).order_by(rank, Activity.id)
+
+    if request.args.get('format') == 'ndjson':
+        def generate():
+            for activity, _ in query.yield_per(STREAM_BATCH_SIZE):
+                yield json.dumps(activity.to_dict()) + '\n'
+
+        return Response(
+            stream_with_context(generate()),
+            mimetype='application/x-ndjson'
+        )
+
+    limit = request.args.get('limit')
+    cursor = request.args.get('cursor')
+
+    if limit is None and cursor is None:
+        return jsonify({
+            'logs': [activity.to_dict() for activity, _ in query.all()]
+        }), 200
+
+    try:
+        limit = parse_limit(limit)
+    except ValueError:
+        return jsonify({'error': 'Invalid limit'}), 400
+
+    if cursor:
+        try:
+            cursor_rank, cursor_id = decode_search_cursor(cursor)
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        query = query.filter(or_(
+            rank > cursor_rank,
+            and_(rank == cursor_rank, Activity.id > cursor_id)
+        ))
+
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    return jsonify({
+        'logs': [activity.to_dict() for activity, _ in rows],
+        'next_cursor': encode_search_cursor(rows[-1][1], rows[-1][0]) if has_more else None
+    }), 200
+
+# Activities created after a cursor (protected)
+# The cursor is the highest activity id the client has seen; ids only grow since
+# activities are never deleted, so this returns exactly the rows written since then
+@app.route('/logs/changes', methods=['GET'])
+@jwt_required()
+def get_log_changes():
+    try:
+        user_id = current_user_id()
+
+        try:
+            since = int(request.args.get('since', 0))
+            limit = min(int(request.args.get('limit', MAX_PAGE_SIZE)), MAX_PAGE_SIZE)
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor or limit'}), 400
+        if limit <= 0:
+            return jsonify({'error': 'Invalid limit'}), 400
+
+        activities = Activity.query.filter(
+            Activity.user_id == user_id,
+            Activity.id > since
+        ).order_by(Activity.id).limit(limit + 1).all()
+        has_more = len(activities) > limit
+        activities = activities[:limit]
+
+        return jsonify({
+            'logs': [activity.to_dict() for activity in activities],
+            'cursor': str(activities[-1].id if activities else since),
+            'has_more': has_more
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch changes'}), 500
+
 # Weekly stats (protected)
 @app.route('/stats/weekly', methods=['GET'])
 @jwt_required()
 def get_weekly_stats():
     try:
-        user_id = get_jwt_identity()
+        user_id = current_user_id()
         category = request.args.get('category')
         today = datetime.now().date()
         week_start = today - timedelta(days=today.weekday())
         week_end = week_start + timedelta(days=6)
+        etag = change_etag(user_id, week_start.isoformat())
+        if request.if_none_match.contains(etag):
+            return '', 304, etag_headers(etag)
         
-        query = Activity.query.filter(
-            Activity.user_id == user_id,
-            Activity.date >= week_start,
-            Activity.date <= week_end
-        )
-        
-        if category and category != 'All':
-            query = query.filter_by(category=category)
-            
-        activities = query.all()
+        rows = query_rollup(user_id, week_start, week_end, category)
         
         daily_stats = {}
-        for activity in activities:
-            date_str = activity.date.isoformat()
-            if date_str not in daily_stats:
-                daily_stats[date_str] = {}
-            if activity.category not in daily_stats[date_str]:
-                daily_stats[date_str][activity.category] = 0
-            daily_stats[date_str][activity.category] += activity.minutes
-            
-        total_minutes = sum(activity.minutes for activity in activities)
         category_totals = {}
-        for activity in activities:
-            if activity.category not in category_totals:
-                category_totals[activity.category] = 0
-            category_totals[activity.category] += activity.minutes
+        for row in rows:
+            date_str = row.date.isoformat()
+            daily_stats.setdefault(date_str, {})[row.category] = row.total_minutes
+            category_totals[row.category] = category_totals.get(row.category, 0) + row.total_minutes
+            
+        total_minutes = sum(category_totals.values())
             
         return jsonify({
             'daily_stats': daily_stats,
@@ -269,10 +1486,241 @@ def get_weekly_stats():
             'category_totals': category_totals,
             'week_start': week_start.isoformat(),
             'week_end': week_end.isoformat()
-        }), 200
+        }), 200, etag_headers(etag)
         
     except Exception as e:
+        app.logger.exception('Failed to fetch weekly stats')
         return jsonify({'error': 'Failed to fetch weekly stats'}), 500
 
+# Stats over an arbitrary range (protected), served entirely from the daily rollup
+@app.route('/stats', methods=['GET'])
+@jwt_required()
+def get_stats():
+    try:
+        user_id = current_user_id()
+        category = request.args.get('category')
+        granularity = request.args.get('granularity', 'day')
+        start_date = request.args.get('start')
+        end_date = request.args.get('end')
+
+        if granularity not in STATS_GRANULARITIES:
+            return jsonify({'error': 'Granularity must be day, week or month'}), 400
+        if not start_date or not end_date:
+            return jsonify({'error': 'Start and end dates are required'}), 400
+
+        try:
+            start = datetime.strptime(start_date, '%Y-%m-%d').date()
+            end = datetime.strptime(end_date, '%Y-%m-%d').date()
+        except ValueError:
+            return jsonify({'error': 'Invalid date format'}), 400
+        if start > end:
+            return jsonify({'error': 'Start date must not be after end date'}), 400
+
+        rows = query_rollup(user_id, start, end, category)
+
+        buckets = {}
+        category_totals = {}
+        for row in rows:
+            bucket_start = STATS_GRANULARITIES[granularity](row.date).isoformat()
+            bucket = buckets.setdefault(bucket_start, {
+                'start': bucket_start,
+                'total_minutes': 0,
+                'count': 0,
+                'categories': {}
+            })
+            bucket['total_minutes'] += row.total_minutes
+            bucket['count'] += row.count
+            bucket['categories'][row.category] = bucket['categories'].get(row.category, 0) + row.total_minutes
+            category_totals[row.category] = category_totals.get(row.category, 0) + row.total_minutes
+
+        return jsonify({
+            'buckets': [buckets[key] for key in sorted(buckets)],
+            'total_minutes': sum(category_totals.values()),
+            'category_totals': category_totals,
+            'granularity': granularity,
+            'start': start.isoformat(),
+            'end': end.isoformat()
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch stats'}), 500
+
+# Year-in-review analytics (protected), computed from the cached daily time series
+@app.route('/stats/analytics', methods=['GET'])
+@jwt_required()
+def get_analytics():
+    try:
+        user_id = current_user_id()
+        today = datetime.now().date()
+
+        try:
+            year = int(request.args.get('year', today.year))
+        except ValueError:
+            return jsonify({'error': 'Invalid year'}), 400
+        if not 1970 <= year <= today.year:
+            return jsonify({'error': 'Invalid year'}), 400
+
+        entry = analytics_cache.get(user_id)
+        return jsonify(compute_analytics(entry, year, today)), 200
+
+    except Exception as e:
+        app.logger.exception('Failed to fetch analytics')
+        return jsonify({'error': 'Failed to fetch analytics'}), 500
+
+# Goals (protected)
+@app.route('/goals', methods=['GET'])
+@jwt_required()
+def get_goals():
+    try:
+        user_id = current_user_id()
+        today = datetime.now().date()
+        goals = Goal.query.filter_by(user_id=user_id).order_by(Goal.id).all()
+        return jsonify({
+            'goals': [dict(goal.to_dict(), progress=goal_progress(goal, today)) for goal in goals]
+        }), 200
+
+    except Exception as e:
+        app.logger.exception('Failed to fetch goals')
+        return jsonify({'error': 'Failed to fetch goals'}), 500
+
+@app.route('/goals', methods=['POST'])
+@jwt_required()
+def create_goal():
+    try:
+        user_id = current_user_id()
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Invalid goal'}), 400
+
+        name = (data.get('name') or '').strip() if isinstance(data.get('name'), str) else ''
+        target_minutes = data.get('target_minutes')
+        period = data.get('period')
+        categories = data.get('categories') or []
+
+        if not name:
+            return jsonify({'error': 'Name is required'}), 400
+        if len(name) > 100:
+            return jsonify({'error': 'Name must be at most 100 characters'}), 400
+        if not isinstance(target_minutes, int) or isinstance(target_minutes, bool) or target_minutes <= 0:
+            return jsonify({'error': 'Valid target minutes required'}), 400
+        if period not in GOAL_PERIODS:
+            return jsonify({'error': 'Period must be weekly, monthly or custom'}), 400
+        if not isinstance(categories, list) or not all(isinstance(c, str) and c for c in categories):
+            return jsonify({'error': 'Categories must be a list of category names'}), 400
+
+        start_date = end_date = None
+        if period == 'custom':
+            try:
+                start_date = datetime.strptime(data.get('start_date'), '%Y-%m-%d').date()
+                end_date = datetime.strptime(data.get('end_date'), '%Y-%m-%d').date()
+            except (ValueError, TypeError):
+                return jsonify({'error': 'Custom goals need valid start and end dates'}), 400
+            if start_date > end_date:
+                return jsonify({'error': 'Start date must not be after end date'}), 400
+
+        goal = Goal(
+            user_id=user_id,
+            name=name,
+            target_minutes=target_minutes,
+            period=period,
+            start_date=start_date,
+            end_date=end_date,
+            categories=json.dumps(sorted(set(categories))) if categories else None
+        )
+        db.session.add(goal)
+        db.session.flush()
+        backfill_goal_progress(goal)
+        db.session.commit()
+
+        return jsonify({
+            'message': 'Goal created successfully',
+            'goal': dict(goal.to_dict(), progress=goal_progress(goal, datetime.now().date()))
+        }), 201
+
+    except Exception as e:
+        db.session.rollback()
+        app.logger.exception('Failed to create goal')
+        return jsonify({'error': 'Failed to create goal'}), 500
+
+@app.route('/goals/<int:goal_id>', methods=['DELETE'])
+@jwt_required()
+def delete_goal(goal_id):
+    try:
+        user_id = current_user_id()
+        goal = Goal.query.filter_by(id=goal_id, user_id=user_id).first()
+        if not goal:
+            return jsonify({'error': 'Goal not found'}), 404
+
+        GoalProgress.query.filter_by(goal_id=goal.id).delete()
+        db.session.delete(goal)
+        db.session.commit()
+        return jsonify({'message': 'Goal deleted successfully'}), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to delete goal'}), 500
+
+@app.route('/goals/<int:goal_id>/progress', methods=['GET'])
+@jwt_required()
+def get_goal_progress(goal_id):
+    try:
+        user_id = current_user_id()
+        goal = Goal.query.filter_by(id=goal_id, user_id=user_id).first()
+        if not goal:
+            return jsonify({'error': 'Goal not found'}), 404
+
+        date_str = request.args.get('date')
+        try:
+            day = datetime.strptime(date_str, '%Y-%m-%d').date() if date_str else datetime.now().date()
+        except ValueError:
+            return jsonify({'error': 'Invalid date format'}), 400
+
+        return jsonify(goal_progress(goal, day)), 200
+
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch goal progress'}), 500
+
+# Recompute the daily rollup from all activities: flask rebuild-rollups
+@app.cli.command('rebuild-rollups')
+def rebuild_rollups_command():
+    rebuild_rollups()
+    analytics_cache.clear()
+    click.echo(f'Rebuilt {DailyRollup.query.count()} rollup rows')
+
+# Recreate the full-text search index from all activities: flask rebuild-search-index
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    rebuild_search_index()
+    click.echo(f'Indexed {Activity.query.count()} activities')
+
+# Import a legacy pipe-delimited log file for a user: flask import-logs log_data.txt alice
+@app.cli.command('import-logs')
+@click.argument('path', type=click.File('r'))
+@click.argument('username')
+@click.option('--chunk-size', default=BATCH_CHUNK_SIZE, show_default=True, help='Rows per transaction')
+def import_logs(path, username, chunk_size):
+    user = User.query.filter_by(username=username).first()
+    if not user:
+        raise click.ClickException(f'Unknown user: {username}')
+
+    def records():
+        for line_no, line in enumerate(path, start=1):
+            if not line.strip():
+                continue
+            yield line_no, parse_legacy_line(line)
+
+    try:
+        inserted, errors, error_count = ingest_activities(user.id, records(), chunk_size=chunk_size)
+    except IngestError as e:
+        raise click.ClickException(f'Import failed after {e.inserted} activities: {e.__cause__}')
+
+    for error in errors:
+        click.echo(f"line {error['line']}: {error['error']}", err=True)
+    if error_count > len(errors):
+        click.echo(f'... {error_count - len(errors)} more errors not shown', err=True)
+    click.echo(f'Imported {inserted} activities for {username} ({error_count} errors)')
+
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,379 @@
+"""Reproducible load test for the WorkTrak backend.
+
+Seeds a temporary SQLite database, then drives /login, /log, /logs (plain,
+filtered, paginated and searched) and /stats/weekly through the Flask test client and
+through a real multi-worker gunicorn. Throughput, p50/p95/p99 latency and peak
+RSS are written as JSON, optionally compared against a saved baseline.
+Each scenario also reports its status codes; 503s (password hashing load
+shedding) are counted as `rejected` rather than `errors`.
+
+Run from worktrak-backend/:
+
+    python benchmarks/bench.py --users 1000 --activities 5000 --output results.json
+    python benchmarks/bench.py --baseline results.json
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import seed  # noqa: E402
+
+SECRET_KEY = 'benchmark-secret-key-0123456789abcdef'
+WARM_UP_LOGINS = 4
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = max(0, int(round(pct / 100 * len(sorted_values))) - 1)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def summarize(latencies, statuses, elapsed):
+    """statuses holds each response's HTTP status, or None if the connection failed."""
+    latencies = sorted(latencies)
+    status_codes = {}
+    for status in statuses:
+        key = str(status) if status is not None else 'connection_error'
+        status_codes[key] = status_codes.get(key, 0) + 1
+    rejected = status_codes.get('503', 0)
+    return {
+        'requests': len(latencies),
+        'errors': sum(1 for status in statuses if status is None or status >= 400) - rejected,
+        'rejected': rejected,
+        'status_codes': dict(sorted(status_codes.items())),
+        'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else None,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def login_request(user_id):
+    return 'POST', '/login', {'username': seed.username_for(user_id), 'password': seed.PASSWORD}, None
+
+
+def build_scenarios(users, rng):
+    """Each scenario yields (method, path, json_body, user_id) for one request."""
+    today = date.today()
+
+    def user():
+        return rng.randint(1, users)
+
+    def logs():
+        return 'GET', '/logs', None, user()
+
+    def logs_filtered():
+        start = today - timedelta(days=rng.randrange(30, 365))
+        return 'GET', (f'/logs?category={rng.choice(seed.CATEGORIES)}'
+                       f'&start_date={start.isoformat()}&end_date={today.isoformat()}'), None, user()
+
+    def logs_page():
+        return 'GET', '/logs?limit=50', None, user()
+
+    def logs_search():
+        query = urllib.parse.urlencode({'q': f'activity {rng.randrange(10)}', 'limit': 50})
+        return 'GET', f'/logs?{query}', None, user()
+
+    def stats_weekly():
+        return 'GET', '/stats/weekly', None, user()
+
+    def login():
+        return login_request(user())
+
+    def log():
+        return 'POST', '/log', {
+            'title': 'Benchmark activity',
+            'category': rng.choice(seed.CATEGORIES),
+            'minutes': rng.randint(10, 240),
+            'date': today.isoformat(),
+        }, user()
+
+    # Reads run before writes so every read scenario sees the same seeded data
+    return [
+        ('logs', logs),
+        ('logs_filtered', logs_filtered),
+        ('logs_page', logs_page),
+        ('logs_search', logs_search),
+        ('stats_weekly', stats_weekly),
+        ('login', login),
+        ('log', log),
+    ]
+
+
+def run_test_client(app_module, tokens, scenarios, requests_per_scenario):
+    client = app_module.app.test_client()
+    results = {}
+    # Start the hash pool so the login scenario does not time process startup
+    run_test_client_scenario(client, tokens, lambda: login_request(1), WARM_UP_LOGINS)
+    # Sampled only while requests run: ru_maxrss would include seeding
+    with RssSampler(os.getpid()) as rss:
+        for name, make_request in scenarios:
+            results[name] = run_test_client_scenario(client, tokens, make_request, requests_per_scenario)
+    return results, rss.peak
+
+
+def run_test_client_scenario(client, tokens, make_request, requests_per_scenario):
+    latencies = []
+    statuses = []
+    started = time.perf_counter()
+    for _ in range(requests_per_scenario):
+        method, path, body, user_id = make_request()
+        headers = {'Authorization': f'Bearer {tokens[user_id]}'} if user_id else {}
+        t0 = time.perf_counter()
+        response = client.open(path, method=method, json=body, headers=headers)
+        response.get_data()
+        latencies.append(time.perf_counter() - t0)
+        statuses.append(response.status_code)
+    return summarize(latencies, statuses, time.perf_counter() - started)
+
+
+def process_tree_rss(pid):
+    """Sum VmRSS over pid and its descendants using /proc (Linux only)."""
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f'/proc/{current}/status') as status:
+                for line in status:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1]) * 1024
+            with open(f'/proc/{current}/task/{current}/children') as children:
+                pending.extend(int(child) for child in children.read().split())
+        except (OSError, ValueError):
+            continue
+    return total
+
+
+class RssSampler:
+    """Track the peak RSS of a process tree on a background thread while in use."""
+
+    def __init__(self, pid, interval=0.1):
+        self.pid = pid
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while True:
+            self.peak = max(self.peak, process_tree_rss(self.pid))
+            if self._stop.wait(self.interval):
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, process_tree_rss(self.pid))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError('gunicorn did not start')
+
+
+def run_gunicorn(env, tokens, scenarios, requests_per_scenario, workers, threads, concurrency):
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}',
+         '--workers', str(workers), '--threads', str(threads), '--log-level', 'warning', 'app:app'],
+        cwd=BACKEND_DIR, env=env
+    )
+    def send(method, path, body, user_id):
+        headers = {'Content-Type': 'application/json'}
+        if user_id:
+            headers['Authorization'] = f'Bearer {tokens[user_id]}'
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(f'http://127.0.0.1:{port}{path}', data=data, method=method, headers=headers)
+        t0 = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req, timeout=60) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            status = e.code
+        except (http.client.HTTPException, OSError):
+            # Connection resets, refusals and timeouts (URLError is an OSError)
+            status = None
+        return time.perf_counter() - t0, status
+
+    results = {}
+    try:
+        wait_for_port(port)
+        with RssSampler(server.pid) as rss, ThreadPoolExecutor(max_workers=concurrency) as pool:
+            # Start each worker's hash pool before timing; concurrent logins spread
+            # across the workers
+            list(pool.map(lambda args: send(*args), [login_request(1)] * (WARM_UP_LOGINS * workers)))
+            for name, make_request in scenarios:
+                batch = [make_request() for _ in range(requests_per_scenario)]
+                started = time.perf_counter()
+                outcomes = list(pool.map(lambda args: send(*args), batch))
+                elapsed = time.perf_counter() - started
+                results[name] = summarize(
+                    [latency for latency, _ in outcomes],
+                    [status for _, status in outcomes],
+                    elapsed
+                )
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    return results, rss.peak
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of regressions: any new errors, or p95/throughput worse than tolerance allows.
+
+    503 rejections are reported per scenario but not treated as regressions.
+    """
+    regressions = []
+    for mode, scenarios in results['modes'].items():
+        for name, current in scenarios.items():
+            previous = baseline.get('modes', {}).get(mode, {}).get(name)
+            if not previous:
+                continue
+            if current['errors'] > previous.get('errors', 0):
+                regressions.append(f"{mode}/{name}: errors {previous.get('errors', 0)} -> {current['errors']}")
+            if current['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+                regressions.append(f"{mode}/{name}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+            if (current['throughput_rps'] or 0) < (previous['throughput_rps'] or 0) * (1 - tolerance):
+                regressions.append(
+                    f"{mode}/{name}: throughput {previous['throughput_rps']} -> {current['throughput_rps']} req/s"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--activities', type=int, default=1000, help='Activities per user')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per scenario')
+    parser.add_argument('--mode', choices=['test-client', 'gunicorn', 'both'], default='both')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers')
+    parser.add_argument('--threads', type=int, default=4, help='gunicorn threads per worker')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent clients against gunicorn')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Write results JSON here (default: stdout)')
+    parser.add_argument('--baseline', help='Compare against a previously saved results JSON')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed fractional regression')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='worktrak-bench-')
+    try:
+        return run(args, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def run(args, workdir):
+    db_path = os.path.join(workdir, 'bench.db')
+    env = dict(
+        os.environ,
+        DATABASE_URL=f'sqlite:///{db_path}',
+        DATABASE_MODE='production',
+        SECRET_KEY=SECRET_KEY,
+        SLOW_REQUEST_MS='0',
+        SLOW_QUERY_MS='0',
+    )
+    # Admit as many concurrent hashes as clients, so the login scenario measures
+    # queued hashing rather than how fast overflow logins are turned away
+    env.setdefault('HASH_QUEUE_LIMIT', str(args.concurrency))
+    os.environ.update(env)
+
+    # Imported only now so the app binds to the benchmark database
+    import app as app_module
+
+    started = time.perf_counter()
+    seed.seed(app_module, db_path, args.users, args.activities, seed_value=args.seed)
+    seed_seconds = time.perf_counter() - started
+
+    with app_module.app.app_context():
+        tokens = {
+            user_id: app_module.create_access_token(identity=str(user_id))
+            for user_id in range(1, args.users + 1)
+        }
+
+    results = {
+        'config': {
+            'users': args.users,
+            'activities_per_user': args.activities,
+            'requests_per_scenario': args.requests,
+            'workers': args.workers,
+            'threads': args.threads,
+            'concurrency': args.concurrency,
+            'hash_queue_limit': int(env['HASH_QUEUE_LIMIT']),
+            'seed': args.seed,
+        },
+        'seed_seconds': round(seed_seconds, 2),
+        'modes': {},
+        'peak_rss_bytes': {},
+    }
+
+    if args.mode in ('test-client', 'both'):
+        scenarios = build_scenarios(args.users, random.Random(args.seed))
+        results['modes']['test_client'], results['peak_rss_bytes']['test_client'] = run_test_client(
+            app_module, tokens, scenarios, args.requests
+        )
+
+    if args.mode in ('gunicorn', 'both'):
+        scenarios = build_scenarios(args.users, random.Random(args.seed))
+        results['modes']['gunicorn'], results['peak_rss_bytes']['gunicorn'] = run_gunicorn(
+            env, tokens, scenarios, args.requests, args.workers, args.threads, args.concurrency
+        )
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('config') != results['config']:
+            print('warning: baseline was recorded with a different config', file=sys.stderr)
+        regressions = compare(results, baseline, args.tolerance)
+        results['regressions'] = regressions
+        exit_code = 1 if regressions else 0
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,61 @@
+import os
+import tempfile
+
+import pytest
+from sqlalchemy import func
+
+# The app binds to its database at import time, so point it at a scratch file first
+_db_dir = tempfile.mkdtemp(prefix='worktrak-test-')
+os.environ['DATABASE_URL'] = f'sqlite:///{_db_dir}/test.db'
+os.environ['SECRET_KEY'] = 'test-secret-key-0123456789abcdef0123'
+os.environ['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+os.environ['HASH_POOL_WORKERS'] = '0'
+os.environ['SLOW_REQUEST_MS'] = '0'
+os.environ['SLOW_QUERY_MS'] = '0'
+
+import app as worktrak  # noqa: E402
+
+
+@pytest.fixture
+def app_module():
+    return worktrak
+
+
+@pytest.fixture
+def client():
+    with worktrak.app.app_context():
+        for table in reversed(worktrak.db.metadata.sorted_tables):
+            worktrak.db.session.execute(table.delete())
+        worktrak.db.session.commit()
+    worktrak.analytics_cache.clear()
+    return worktrak.app.test_client()
+
+
+def login(client, username='alice', password='secret1'):
+    client.post('/register', json={'username': username, 'password': password})
+    response = client.post('/login', json={'username': username, 'password': password})
+    return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+
+@pytest.fixture
+def auth(client):
+    return login(client)
+
+
+def rollup_matches_activities(app_module):
+    """Assert the maintained rollup equals a fresh aggregate over Activity, and return it."""
+    Activity, DailyRollup = app_module.Activity, app_module.DailyRollup
+    with app_module.app.app_context():
+        expected = {
+            (user_id, day, category): (minutes, count)
+            for user_id, day, category, minutes, count in app_module.db.session.query(
+                Activity.user_id, Activity.date, Activity.category,
+                func.sum(Activity.minutes), func.count(Activity.id)
+            ).group_by(Activity.user_id, Activity.date, Activity.category)
+        }
+        actual = {
+            (row.user_id, row.date, row.category): (row.total_minutes, row.count)
+            for row in DailyRollup.query.filter(DailyRollup.count > 0)
+        }
+    assert actual == expected
+    return actual
@@ -0,0 +1,54 @@
+from datetime import timedelta
+
+GOAL_PERIODS = ('weekly', 'monthly', 'custom')
+
+
+def period_window(period, day, start_date=None, end_date=None):
+    """Return the (start, end) window of a goal that contains day, or None."""
+    if period == 'weekly':
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=6)
+    if period == 'monthly':
+        start = day.replace(day=1)
+        next_month = (start + timedelta(days=32)).replace(day=1)
+        return start, next_month - timedelta(days=1)
+    if period == 'custom':
+        if start_date <= day <= end_date:
+            return start_date, end_date
+        return None
+    raise ValueError(f'Unknown goal period: {period}')
+
+
+class GoalTracker:
+    """Turns logged activities into running-total increments for a set of goals.
+
+    Each goal keeps one total per window (week, month or its custom range), so
+    an activity only touches the goals whose categories it matches and only the
+    window containing its date.
+    """
+
+    def __init__(self, goals):
+        self.goals = goals  # objects with id, period, start_date, end_date, category_list()
+
+    def matches(self, goal, category):
+        categories = goal.category_list()
+        return not categories or category in categories
+
+    def increments(self, records):
+        """Map (goal_id, window_start) -> [minutes, count] for activity records.
+
+        Records are dicts with date, category and minutes; an optional count lets
+        pre-aggregated rows (such as daily rollups) be applied in one step.
+        """
+        totals = {}
+        for record in records:
+            for goal in self.goals:
+                if not self.matches(goal, record['category']):
+                    continue
+                window = period_window(goal.period, record['date'], goal.start_date, goal.end_date)
+                if window is None:
+                    continue
+                total = totals.setdefault((goal.id, window[0]), [0, 0])
+                total[0] += record['minutes']
+                total[1] += record.get('count', 1)
+        return totals
@@ -0,0 +1,53 @@
+from conftest import login
+
+
+def test_login_token_works_on_protected_endpoints(client):
+    headers = login(client)
+    response = client.get('/logs', headers=headers)
+    assert response.status_code == 200
+    assert response.get_json() == {'logs': []}
+
+
+def test_login_rejects_bad_password(client):
+    login(client)
+    response = client.post('/login', json={'username': 'alice', 'password': 'wrong-password'})
+    assert response.status_code == 401
+
+
+def test_hashing_overload_returns_503_with_retry_after(client, app_module):
+    login(client)
+    hasher = app_module.password_hasher
+    held = 0
+    while hasher.slots.acquire(blocking=False):
+        held += 1
+    try:
+        for path, username in (('/login', 'alice'), ('/register', 'bob')):
+            response = client.post(path, json={'username': username, 'password': 'secret1'})
+            assert response.status_code == 503
+            assert response.headers['Retry-After'] == str(app_module.app.config['HASH_RETRY_AFTER'])
+    finally:
+        for _ in range(held):
+            hasher.slots.release()
+
+    assert client.post('/login', json={'username': 'alice', 'password': 'secret1'}).status_code == 200
+
+
+def test_login_rehashes_when_method_changes(client, app_module):
+    login(client)
+    app_module.app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:2000'
+    try:
+        response = client.post('/login', json={'username': 'alice', 'password': 'secret1'})
+        assert response.status_code == 200
+        with app_module.app.app_context():
+            user = app_module.User.query.filter_by(username='alice').first()
+            assert user.password_hash.startswith('pbkdf2:sha256:2000$')
+            assert not user.needs_rehash()
+    finally:
+        app_module.app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+
+
+def test_process_pool_hashes_and_verifies(app_module):
+    hasher = app_module.PasswordHasher(workers=1, queue_limit=1)
+    hashed = hasher.run(app_module.generate_password_hash, 'secret1', method='pbkdf2:sha256:1000')
+    assert hasher.run(app_module.check_password_hash, hashed, 'secret1')
+    hasher.pool.shutdown()
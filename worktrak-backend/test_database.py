@@ -0,0 +1,114 @@
+import threading
+import time
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, event, text
+
+from conftest import login, rollup_matches_activities
+
+
+def test_production_pragmas(app_module, tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path}/prod.db')
+    event.listen(engine, 'connect', app_module.configure_sqlite_connection)
+    with engine.connect() as conn:
+        assert conn.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+        # NORMAL
+        assert conn.execute(text('PRAGMA synchronous')).scalar() == 1
+        assert conn.execute(text('PRAGMA busy_timeout')).scalar() == app_module.app.config['SQLITE_BUSY_TIMEOUT_MS']
+    engine.dispose()
+
+
+@pytest.fixture
+def group_commit(app_module, monkeypatch):
+    writer = app_module.GroupCommitWriter(app_module.app, window=0.2, max_batch=10, timeout=5)
+    monkeypatch.setattr(app_module, 'group_commit', writer)
+    return writer
+
+
+def test_group_commit_batches_concurrent_logs(client, auth, app_module, group_commit, monkeypatch):
+    batches = []
+    write = group_commit._write
+
+    def record_batch(batch):
+        batches.append(len(batch))
+        return write(batch)
+
+    monkeypatch.setattr(group_commit, '_write', record_batch)
+    bob = login(client, username='bob')
+    responses = []
+
+    def post(headers, i):
+        responses.append(app_module.app.test_client().post('/log', headers=headers, json={
+            'title': f'Task {i}', 'category': 'Study', 'minutes': 10, 'date': '2025-06-02'
+        }))
+
+    threads = [threading.Thread(target=post, args=(auth if i % 2 else bob, i)) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [response.status_code for response in responses] == [201] * 6
+    assert sum(batches) == 6 and len(batches) < 6
+    user_ids = {response.get_json()['activity']['user_id'] for response in responses}
+    assert all(isinstance(user_id, int) for user_id in user_ids) and len(user_ids) == 2
+    rollup = rollup_matches_activities(app_module)
+    assert sorted(rollup.values()) == [(30, 3), (30, 3)]
+    assert len(client.get('/logs', headers=auth).get_json()['logs']) == 3
+
+
+def test_group_commit_isolates_failing_row(client, auth, app_module, group_commit):
+    with app_module.app.app_context():
+        user_id = app_module.User.query.filter_by(username='alice').one().id
+    good = {'title': 'Good', 'category': 'Study', 'minutes': 10, 'date': date(2025, 6, 2)}
+    bad = dict(good, category=None)
+    outcomes = {}
+
+    def submit(name, fields):
+        try:
+            outcomes[name] = group_commit.submit(user_id, fields)
+        except Exception as e:
+            outcomes[name] = e
+
+    threads = [threading.Thread(target=submit, args=args) for args in (('a', good), ('bad', bad), ('b', good))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert outcomes['a']['title'] == 'Good' and outcomes['b']['title'] == 'Good'
+    assert isinstance(outcomes['bad'], Exception)
+    assert len(client.get('/logs', headers=auth).get_json()['logs']) == 2
+    rollup_matches_activities(app_module)
+
+
+def test_group_commit_withdraws_rows_that_time_out(client, auth, app_module):
+    with app_module.app.app_context():
+        user_id = app_module.User.query.filter_by(username='alice').one().id
+    writer = app_module.GroupCommitWriter(app_module.app, window=0.3, max_batch=10, timeout=0.05)
+    fields = {'title': 'Slow', 'category': 'Study', 'minutes': 10, 'date': date(2025, 6, 2)}
+
+    with pytest.raises(app_module.FutureTimeoutError):
+        writer.submit(user_id, fields)
+    writer.timeout = 5
+    assert writer.submit(user_id, dict(fields, title='Next'))['title'] == 'Next'
+
+    assert [row['title'] for row in client.get('/logs', headers=auth).get_json()['logs']] == ['Next']
+    rollup_matches_activities(app_module)
+
+
+def test_group_commit_waits_for_rows_already_being_written(client, auth, app_module, monkeypatch):
+    with app_module.app.app_context():
+        user_id = app_module.User.query.filter_by(username='alice').one().id
+    writer = app_module.GroupCommitWriter(app_module.app, window=0, max_batch=10, timeout=0.05)
+    write = writer._write
+
+    def slow_write(batch):
+        time.sleep(0.3)
+        return write(batch)
+
+    monkeypatch.setattr(writer, '_write', slow_write)
+    fields = {'title': 'Slow', 'category': 'Study', 'minutes': 10, 'date': date(2025, 6, 2)}
+    assert writer.submit(user_id, fields)['title'] == 'Slow'
+    assert len(client.get('/logs', headers=auth).get_json()['logs']) == 1
@@ -0,0 +1,78 @@
+from conftest import login
+
+
+def log(client, headers, date, category='Study', minutes=30):
+    response = client.post('/log', headers=headers, json={
+        'title': 'Work', 'category': category, 'minutes': minutes, 'date': date
+    })
+    assert response.status_code == 201
+
+
+def create_goal(client, headers, **fields):
+    response = client.post('/goals', headers=headers, json=dict(
+        {'name': 'Goal', 'target_minutes': 120, 'period': 'weekly'}, **fields
+    ))
+    assert response.status_code == 201
+    return response.get_json()['goal']
+
+
+def progress(client, headers, goal, date):
+    response = client.get(f"/goals/{goal['id']}/progress?date={date}", headers=headers)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_new_goal_is_backfilled_from_history(client, auth):
+    # 2025-06-02 is a Monday
+    log(client, auth, '2025-06-02', minutes=30)
+    log(client, auth, '2025-06-08', minutes=45)
+    log(client, auth, '2025-06-08', category='Gym', minutes=60)
+    log(client, auth, '2025-06-09', minutes=90)
+
+    study = create_goal(client, auth, categories=['Study'])
+    week = progress(client, auth, study, '2025-06-04')
+    assert (week['window_start'], week['window_end']) == ('2025-06-02', '2025-06-08')
+    assert (week['minutes'], week['count']) == (75, 2)
+    assert progress(client, auth, study, '2025-06-10')['minutes'] == 90
+
+    everything = create_goal(client, auth, period='monthly', target_minutes=200)
+    month = progress(client, auth, everything, '2025-06-15')
+    assert (month['minutes'], month['count']) == (225, 4)
+    assert month['completed'] and month['remaining_minutes'] == 0
+
+
+def test_logging_increments_matching_goals_only(client, auth):
+    study = create_goal(client, auth, categories=['Study'])
+    custom = create_goal(client, auth, period='custom', start_date='2025-06-05', end_date='2025-06-20')
+    bob = login(client, username='bob')
+    bob_goal = create_goal(client, bob)
+
+    log(client, auth, '2025-06-03', minutes=30)
+    log(client, auth, '2025-06-06', category='Gym', minutes=40)
+    client.post('/log/batch', headers=auth, json={'activities': [
+        {'title': 'Work', 'category': 'Study', 'minutes': 20, 'date': '2025-06-07'},
+        {'title': 'Work', 'category': 'Study', 'minutes': 25, 'date': '2025-06-21'},
+    ]})
+
+    assert progress(client, auth, study, '2025-06-03')['minutes'] == 50
+    custom_progress = progress(client, auth, custom, '2025-07-01')
+    assert (custom_progress['window_start'], custom_progress['window_end']) == ('2025-06-05', '2025-06-20')
+    assert (custom_progress['minutes'], custom_progress['count']) == (60, 2)
+    assert progress(client, bob, bob_goal, '2025-06-03')['minutes'] == 0
+
+
+def test_goal_validation_and_ownership(client, auth):
+    assert client.post('/goals', headers=auth, json={'name': 'G', 'target_minutes': 0, 'period': 'weekly'}).status_code == 400
+    assert client.post('/goals', headers=auth, json=[{'name': 'G'}]).status_code == 400
+    assert client.post('/goals', headers=auth, json={'name': 'G' * 101, 'target_minutes': 60, 'period': 'weekly'}).status_code == 400
+    assert client.post('/goals', headers=auth, json={'name': 'G', 'target_minutes': 60, 'period': 'daily'}).status_code == 400
+    assert client.post('/goals', headers=auth, json={
+        'name': 'G', 'target_minutes': 60, 'period': 'custom', 'start_date': '2025-06-10', 'end_date': '2025-06-01'
+    }).status_code == 400
+
+    goal = create_goal(client, auth)
+    bob = login(client, username='bob')
+    assert client.get(f"/goals/{goal['id']}/progress", headers=bob).status_code == 404
+    assert client.delete(f"/goals/{goal['id']}", headers=bob).status_code == 404
+    assert client.delete(f"/goals/{goal['id']}", headers=auth).status_code == 200
+    assert client.get('/goals', headers=auth).get_json() == {'goals': []}
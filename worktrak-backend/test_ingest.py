@@ -0,0 +1,115 @@
+from conftest import login, rollup_matches_activities
+
+
+def test_batch_rejects_non_object_and_unbindable_records(client, auth):
+    assert client.post('/log/batch', headers=auth, json=[{'title': 'A'}]).status_code == 400
+
+    response = client.post('/log/batch', headers=auth, json={'activities': [
+        {'title': 'x' * 201, 'category': 'Study', 'minutes': 5, 'date': '2025-06-02'},
+        {'title': 'A', 'category': ['Study'], 'minutes': 5, 'date': '2025-06-02'},
+        {'title': 'A', 'category': 'Study', 'minutes': 5, 'date': '2025-06-02'},
+    ]})
+    assert response.status_code == 201
+    body = response.get_json()
+    assert body['inserted'] == 1
+    assert [error['line'] for error in body['errors']] == [1, 2]
+
+
+def test_batch_accepts_ndjson_and_reports_bad_lines(client, auth):
+    ndjson = '\n'.join([
+        '{"title": "A", "category": "Study", "minutes": 5, "date": "2025-06-02"}',
+        'not json',
+        '',
+        '{"title": "B", "category": "Study", "minutes": "10", "date": "2025-06-03"}',
+    ])
+    response = client.post('/log/batch', headers=dict(auth, **{'Content-Type': 'application/x-ndjson'}), data=ndjson)
+    assert response.status_code == 201
+    body = response.get_json()
+    assert body['inserted'] == 2
+    assert body['errors'] == [{'line': 2, 'error': 'Invalid record'}]
+    assert [row['minutes'] for row in client.get('/logs', headers=auth).get_json()['logs']] == [10, 5]
+
+
+def test_batch_failure_reports_committed_rows(client, auth, app_module, monkeypatch):
+    calls = []
+    insert = app_module.insert_activities
+
+    def fail_second_chunk(user_id, records):
+        calls.append(len(records))
+        if len(calls) == 2:
+            raise RuntimeError('disk full')
+        insert(user_id, records)
+
+    monkeypatch.setattr(app_module, 'insert_activities', fail_second_chunk)
+    monkeypatch.setattr(app_module.ingest_activities, '__defaults__', (2,))
+    activities = [
+        {'title': f'T{i}', 'category': 'Study', 'minutes': 5, 'date': '2025-06-02'}
+        for i in range(4)
+    ]
+    response = client.post('/log/batch', headers=auth, json={'activities': activities})
+    assert response.status_code == 500
+    assert response.get_json()['inserted'] == 2
+    rollup_matches_activities(app_module)
+
+
+def test_parse_legacy_line(app_module):
+    parse = app_module.parse_legacy_line
+    assert parse('2025-06-06 | School | 2 hours') == {
+        'title': 'School', 'category': 'School', 'minutes': 120, 'date': '2025-06-06'
+    }
+    assert parse('2025-06-08 | School | R1B Paper #1 Grind | 180 minutes') == {
+        'title': 'R1B Paper #1 Grind', 'category': 'School', 'minutes': 180, 'date': '2025-06-08'
+    }
+    assert parse('2025-06-08 | School | 1.5 hour')['minutes'] == 90
+    assert parse('2025-06-08 | School | 2 days') is None
+    assert parse('2025-06-08 | School | many minutes') is None
+    assert parse('2025-06-08 School 2 hours') is None
+
+
+def test_import_logs_command(client, app_module, tmp_path):
+    login(client)
+    path = tmp_path / 'log_data.txt'
+    path.write_text(
+        '2025-06-06 | School | 2 hours\n'
+        '\n'
+        'garbage\n'
+        '2025-06-08 | School | R1B Paper #1 Grind | 180 minutes\n'
+    )
+    runner = app_module.app.test_cli_runner()
+
+    result = runner.invoke(args=['import-logs', str(path), 'alice', '--chunk-size', '1'])
+    assert result.exit_code == 0
+    assert 'line 3: Invalid record' in result.output
+    assert 'Imported 2 activities for alice (1 errors)' in result.output
+    rollup_matches_activities(app_module)
+
+    result = runner.invoke(args=['import-logs', str(path), 'nobody'])
+    assert result.exit_code != 0
+    assert 'Unknown user: nobody' in result.output
+
+
+def test_batch_counts_errors_beyond_the_reported_ones(client, auth, app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'MAX_REPORTED_ERRORS', 2)
+    response = client.post('/log/batch', headers=auth, json={'activities': [{'title': 'A'}] * 5})
+    assert response.status_code == 400
+    body = response.get_json()
+    assert body['error'] and body['inserted'] == 0
+    assert len(body['errors']) == 2 and body['error_count'] == 5
+
+    empty = client.post('/log/batch', headers=dict(auth, **{'Content-Type': 'application/x-ndjson'}), data='')
+    assert empty.status_code == 400
+    assert empty.get_json()['error']
+
+
+def test_import_logs_summary_counts_every_error(client, app_module, monkeypatch, tmp_path):
+    login(client)
+    monkeypatch.setattr(app_module, 'MAX_REPORTED_ERRORS', 1)
+    path = tmp_path / 'log_data.txt'
+    path.write_text('garbage\nmore garbage\n2025-06-06 | School | 2 hours\nstill garbage\n')
+
+    result = app_module.app.test_cli_runner().invoke(args=['import-logs', str(path), 'alice'])
+    assert result.exit_code == 0
+    assert 'line 1: Invalid record' in result.output
+    assert 'line 2' not in result.output
+    assert '2 more errors not shown' in result.output
+    assert 'Imported 1 activities for alice (3 errors)' in result.output
@@ -0,0 +1,194 @@
+import json
+
+from sqlalchemy import text
+
+from conftest import login
+
+
+def log(client, headers, title, date, category='Study', minutes=30):
+    response = client.post('/log', headers=headers, json={
+        'title': title, 'category': category, 'minutes': minutes, 'date': date
+    })
+    assert response.status_code == 201
+    return response.get_json()['activity']
+
+
+def walk(client, headers, path):
+    """Follow next_cursor from path until the last page, returning every row."""
+    rows = []
+    response = client.get(path, headers=headers).get_json()
+    rows.extend(response['logs'])
+    while response['next_cursor']:
+        response = client.get(f"{path}&cursor={response['next_cursor']}", headers=headers).get_json()
+        rows.extend(response['logs'])
+    return rows
+
+
+def test_keyset_pagination_walks_every_row_once(client, auth):
+    # Several rows per date so the id tiebreak is exercised
+    for i in range(7):
+        log(client, auth, f'Task {i}', f'2025-06-0{1 + i % 3}')
+
+    full = client.get('/logs', headers=auth).get_json()['logs']
+    paged = walk(client, auth, '/logs?limit=2')
+
+    assert [row['id'] for row in paged] == [row['id'] for row in full]
+    assert [row['date'] for row in full] == sorted((row['date'] for row in full), reverse=True)
+
+
+def test_pagination_rejects_bad_limit_and_cursor(client, auth):
+    assert client.get('/logs?limit=0', headers=auth).status_code == 400
+    assert client.get('/logs?limit=2&cursor=garbage', headers=auth).status_code == 400
+
+
+def test_ndjson_streams_filtered_rows_in_page_order(client, auth):
+    for i in range(5):
+        log(client, auth, f'Task {i}', f'2025-06-0{i + 1}', category='Gym' if i % 2 else 'Study')
+    bob = login(client, username='bob')
+    log(client, bob, 'Bob task', '2025-06-01')
+
+    response = client.get('/logs?format=ndjson&category=Study', headers=auth)
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    expected = client.get('/logs?category=Study', headers=auth).get_json()['logs']
+    assert rows == expected
+    assert [row['title'] for row in rows] == ['Task 4', 'Task 2', 'Task 0']
+
+
+def test_etag_revalidation(client, auth):
+    response = client.get('/logs', headers=auth)
+    etag = response.headers['ETag']
+    assert client.get('/logs', headers=dict(auth, **{'If-None-Match': etag})).status_code == 304
+
+    weekly = client.get('/stats/weekly', headers=auth)
+    weekly_etag = weekly.headers['ETag']
+    assert client.get('/stats/weekly', headers=dict(auth, **{'If-None-Match': weekly_etag})).status_code == 304
+
+    log(client, auth, 'New task', '2025-06-01')
+    response = client.get('/logs', headers=dict(auth, **{'If-None-Match': etag}))
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert client.get('/stats/weekly', headers=dict(auth, **{'If-None-Match': weekly_etag})).status_code == 200
+
+
+def test_etag_is_per_user(client, auth):
+    etag = client.get('/logs', headers=auth).headers['ETag']
+    bob = login(client, username='bob')
+    log(client, bob, 'Bob task', '2025-06-01')
+    assert client.get('/logs', headers=dict(auth, **{'If-None-Match': etag})).status_code == 304
+
+
+def test_changes_feed_returns_new_rows_in_pages(client, auth):
+    first = log(client, auth, 'One', '2025-06-01')
+    bob = login(client, username='bob')
+    log(client, bob, 'Bob task', '2025-06-01')
+    second = log(client, auth, 'Two', '2025-05-01')
+    third = log(client, auth, 'Three', '2025-06-03')
+
+    page = client.get('/logs/changes?since=0&limit=2', headers=auth).get_json()
+    assert [row['id'] for row in page['logs']] == [first['id'], second['id']]
+    assert page['has_more']
+
+    page = client.get(f"/logs/changes?since={page['cursor']}&limit=2", headers=auth).get_json()
+    assert [row['id'] for row in page['logs']] == [third['id']]
+    assert not page['has_more']
+
+    page = client.get(f"/logs/changes?since={page['cursor']}", headers=auth).get_json()
+    assert page['logs'] == []
+    assert page['cursor'] == str(third['id'])
+
+    assert client.get('/logs/changes?since=abc', headers=auth).status_code == 400
+
+
+def test_search_matches_prefixes_and_stays_per_user(client, auth):
+    log(client, auth, 'Paper review', '2025-06-01', category='Research')
+    log(client, auth, 'Leetcode grind', '2025-06-02', category='Coding')
+    log(client, auth, 'Résumé update', '2025-06-03', category='Career')
+    bob = login(client, username='bob')
+    log(client, bob, 'Paper reading', '2025-06-01')
+
+    def titles(q, headers=auth):
+        response = client.get(f'/logs?q={q}', headers=headers)
+        assert response.status_code == 200
+        return sorted(row['title'] for row in response.get_json()['logs'])
+
+    assert titles('pap') == ['Paper review']
+    assert titles('coding') == ['Leetcode grind']
+    assert titles('resume') == ['Résumé update']
+    assert titles('paper') == ['Paper review']
+    assert titles('paper', bob) == ['Paper reading']
+    # The user_id column is not searchable as text
+    assert titles('1') == []
+    assert client.get('/logs?q=%20!', headers=auth).status_code == 400
+
+
+def test_search_cursor_pagination_matches_unpaged_order(client, auth):
+    for i, title in enumerate(['paper', 'paper paper paper', 'paper notes', 'paper paper', 'other']):
+        log(client, auth, title, f'2025-06-0{i + 1}')
+
+    full = client.get('/logs?q=paper', headers=auth).get_json()['logs']
+    paged = walk(client, auth, '/logs?q=paper&limit=1')
+    assert len(full) == 4
+    assert [row['id'] for row in paged] == [row['id'] for row in full]
+
+    by_date = walk(client, auth, '/logs?q=paper&sort=date&limit=3')
+    assert [row['date'] for row in by_date] == ['2025-06-04', '2025-06-03', '2025-06-02', '2025-06-01']
+
+    for cursor in ('nan_1', 'inf_1', 'garbage'):
+        assert client.get(f'/logs?q=paper&limit=1&cursor={cursor}', headers=auth).status_code == 400
+
+
+def test_search_index_follows_updates_and_deletes(client, auth, app_module):
+    activity = log(client, auth, 'Draft thesis', '2025-06-01')
+    with app_module.app.app_context():
+        db = app_module.db
+        db.session.execute(
+            text('UPDATE activity SET title = :title WHERE id = :id'),
+            {'title': 'Final thesis', 'id': activity['id']}
+        )
+        db.session.commit()
+
+    def ids(q):
+        return [row['id'] for row in client.get(f'/logs?q={q}', headers=auth).get_json()['logs']]
+
+    assert ids('draft') == []
+    assert ids('final') == [activity['id']]
+
+    with app_module.app.app_context():
+        db = app_module.db
+        db.session.execute(text('DELETE FROM activity WHERE id = :id'), {'id': activity['id']})
+        db.session.commit()
+    assert ids('thesis') == []
+
+
+def test_rebuild_search_index_upgrades_old_schema(client, auth, app_module):
+    activity = log(client, auth, 'Paper review', '2025-06-01')
+    with app_module.app.app_context():
+        db = app_module.db
+        db.session.execute(text('DROP TABLE activity_fts'))
+        db.session.execute(text("CREATE VIRTUAL TABLE activity_fts USING fts5(title, category, content='activity', content_rowid='id')"))
+        db.session.commit()
+        assert app_module.search_index_outdated()
+        app_module.rebuild_search_index()
+        assert not app_module.search_index_outdated()
+
+    logs = client.get('/logs?q=review', headers=auth).get_json()['logs']
+    assert [row['id'] for row in logs] == [activity['id']]
+
+
+def test_ranked_search_is_not_revalidated(client, auth):
+    log(client, auth, 'alpha beta', '2025-06-01')
+    etag = client.get('/logs', headers=auth).headers['ETag']
+
+    response = client.get('/logs?q=alpha', headers=dict(auth, **{'If-None-Match': etag}))
+    assert response.status_code == 200
+    assert 'ETag' not in response.headers
+
+    # Date-ordered search only depends on the user's own rows, so it keeps its ETag
+    by_date = client.get('/logs?q=alpha&sort=date', headers=auth)
+    date_etag = by_date.headers['ETag']
+    bob = login(client, username='bob')
+    log(client, bob, 'alpha gamma', '2025-06-01')
+    assert client.get('/logs?q=alpha&sort=date', headers=dict(auth, **{'If-None-Match': date_etag})).status_code == 304
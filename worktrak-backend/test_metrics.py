@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+PID = f'pid="{os.getpid()}"'
+
+
+@pytest.fixture
+def metrics(app_module, monkeypatch):
+    fresh = app_module.Metrics()
+    monkeypatch.setattr(app_module, 'metrics', fresh)
+    return fresh
+
+
+def scrape(client):
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    return response.get_data(as_text=True).splitlines()
+
+
+def test_metrics_count_requests_by_endpoint_and_status(client, auth, metrics):
+    client.get('/logs', headers=auth)
+    client.get('/logs', headers=auth)
+    client.get('/logs?limit=0', headers=auth)
+    client.get('/missing')
+
+    lines = scrape(client)
+    assert f'worktrak_requests_total{{{PID},endpoint="/logs",method="GET",status="200"}} 2' in lines
+    assert f'worktrak_requests_total{{{PID},endpoint="/logs",method="GET",status="400"}} 1' in lines
+    assert f'worktrak_requests_total{{{PID},endpoint="unmatched",method="GET",status="404"}} 1' in lines
+    assert '# TYPE worktrak_request_duration_seconds histogram' in lines
+    assert f'worktrak_request_duration_seconds_count{{{PID},endpoint="/logs",method="GET"}} 3' in lines
+    assert f'worktrak_request_duration_seconds_bucket{{{PID},endpoint="/logs",method="GET",le="+Inf"}} 3' in lines
+
+
+def test_histogram_buckets_are_cumulative(app_module):
+    histogram = app_module.Histogram('h', 'Test.', (1, 5), ('endpoint',))
+    for value in (0.5, 3, 10):
+        histogram.observe(('/x',), value)
+    assert histogram.render()[2:] == [
+        'h_bucket{endpoint="/x",le="1"} 1',
+        'h_bucket{endpoint="/x",le="5"} 2',
+        'h_bucket{endpoint="/x",le="+Inf"} 3',
+        'h_sum{endpoint="/x"} 13.5',
+        'h_count{endpoint="/x"} 3',
+    ]
+
+
+def test_sql_statements_are_counted_per_request(client, auth, metrics):
+    client.get('/logs', headers=auth)
+    lines = scrape(client)
+    count = next(line for line in lines
+                 if line.startswith(f'worktrak_request_sql_statements_sum{{{PID},endpoint="/logs"'))
+    assert float(count.rsplit(' ', 1)[1]) >= 1
+    assert any(line.startswith(f'worktrak_sql_query_duration_seconds_count{{{PID}}} ') for line in lines)
+
+
+def test_every_series_carries_the_worker_pid(client, auth, metrics):
+    client.get('/logs', headers=auth)
+    samples = [line for line in scrape(client) if not line.startswith('#')]
+    assert samples
+    assert all(PID in line for line in samples)
@@ -0,0 +1,145 @@
+from datetime import datetime
+
+import pytest
+
+from conftest import rollup_matches_activities
+
+
+def test_rollup_tracks_single_and_batch_logs(client, auth, app_module):
+    client.post('/log', headers=auth, json={'title': 'A', 'category': 'Study', 'minutes': 30, 'date': '2025-06-02'})
+    client.post('/log', headers=auth, json={'title': 'B', 'category': 'Study', 'minutes': 15, 'date': '2025-06-02'})
+    response = client.post('/log/batch', headers=auth, json={'activities': [
+        {'title': 'C', 'category': 'Study', 'minutes': 45, 'date': '2025-06-02'},
+        {'title': 'D', 'category': 'Gym', 'minutes': 60, 'date': '2025-06-09'},
+        {'title': 'bad', 'category': 'Gym', 'minutes': 0, 'date': '2025-06-09'},
+    ]})
+    assert response.status_code == 201
+    assert response.get_json()['inserted'] == 2
+    ndjson = '{"title": "E", "category": "Gym", "minutes": 20, "date": "2025-06-09"}\n'
+    response = client.post('/log/batch', headers=dict(auth, **{'Content-Type': 'application/x-ndjson'}), data=ndjson)
+    assert response.status_code == 201
+
+    rollup = rollup_matches_activities(app_module)
+    assert sorted(rollup.values()) == [(80, 2), (90, 3)]
+
+    stats = client.get('/stats?start=2025-06-01&end=2025-06-30&granularity=week', headers=auth).get_json()
+    assert stats['category_totals'] == {'Study': 90, 'Gym': 80}
+    assert [bucket['start'] for bucket in stats['buckets']] == ['2025-06-02', '2025-06-09']
+    assert [bucket['count'] for bucket in stats['buckets']] == [3, 2]
+
+
+def test_stats_validates_range(client, auth):
+    assert client.get('/stats?start=2025-06-01', headers=auth).status_code == 400
+    assert client.get('/stats?start=2025-06-30&end=2025-06-01', headers=auth).status_code == 400
+    assert client.get('/stats?start=2025-06-01&end=2025-06-30&granularity=year', headers=auth).status_code == 400
+
+
+def test_rebuild_rollups_invalidates_etags(client, auth, app_module):
+    client.post('/log', headers=auth, json={'title': 'A', 'category': 'Study', 'minutes': 30, 'date': '2025-06-02'})
+    etag = client.get('/stats/weekly', headers=auth).headers['ETag']
+    with app_module.app.app_context():
+        app_module.rebuild_rollups()
+    rollup_matches_activities(app_module)
+    assert client.get('/stats/weekly', headers=dict(auth, **{'If-None-Match': etag})).status_code == 200
+
+
+class FrozenDatetime(datetime):
+    current = datetime(2025, 6, 10, 12)
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current
+
+
+@pytest.fixture
+def today(app_module, monkeypatch):
+    """Freeze the app's clock; set FrozenDatetime.current to move it."""
+    monkeypatch.setattr(app_module, 'datetime', FrozenDatetime)
+    monkeypatch.setattr(FrozenDatetime, 'current', FrozenDatetime.current)
+    return FrozenDatetime
+
+
+def log(client, headers, date, minutes=30, category='Study'):
+    response = client.post('/log', headers=headers, json={
+        'title': 'Work', 'category': category, 'minutes': minutes, 'date': date
+    })
+    assert response.status_code == 201
+
+
+def analytics(client, headers, year=None):
+    response = client.get(f'/stats/analytics?year={year}' if year else '/stats/analytics', headers=headers)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_analytics_streaks_follow_the_clock(client, auth, app_module, today):
+    for day in ('2025-06-01', '2025-06-02', '2025-06-03', '2025-06-07', '2025-06-08', '2025-06-09'):
+        log(client, auth, day)
+
+    result = analytics(client, auth)
+    assert (result['current_streak'], result['longest_streak']) == (3, 3)
+    assert result['active_days'] == 6 and result['total_minutes'] == 180
+
+    # No writes, so the cached entry (built through June 10) is reused
+    today.current = datetime(2025, 6, 12, 12)
+    result = analytics(client, auth)
+    assert (result['current_streak'], result['longest_streak']) == (0, 3)
+    assert len(result['daily_minutes']) == 163
+
+
+def test_analytics_rolling_averages_look_back_into_december(client, auth, today):
+    today.current = datetime(2025, 1, 3, 12)
+    log(client, auth, '2024-12-31', minutes=70)
+    log(client, auth, '2025-01-02', minutes=14)
+
+    result = analytics(client, auth)
+    assert result['daily_minutes'] == [0, 14, 0]
+    assert result['total_minutes'] == 14
+    assert result['rolling_7_day_average'] == [10.0, 12.0, 12.0]
+    assert result['rolling_30_day_average'] == [2.33, 2.8, 2.8]
+    assert result['category_trends']['Study']['monthly_minutes'][0] == 14
+
+    previous = analytics(client, auth, year=2024)
+    assert previous['daily_minutes'][-1] == 70
+    assert client.get('/stats/analytics?year=2026', headers=auth).status_code == 400
+
+
+def test_analytics_cache_applies_own_writes_and_rebuilds_after_others(client, auth, app_module, today):
+    log(client, auth, '2025-06-09')
+    assert analytics(client, auth)['total_minutes'] == 30
+
+    # Applied in place: the entry stays cached and its tag follows the database
+    log(client, auth, '2025-06-10', minutes=15, category='Gym')
+    with app_module.app.app_context():
+        user_id = app_module.User.query.filter_by(username='alice').one().id
+        seq = app_module.db.session.get(app_module.ChangeSequence, user_id).seq
+    assert app_module.analytics_cache.entries[user_id]['seq'] == seq
+    result = analytics(client, auth)
+    assert result['total_minutes'] == 45
+    assert result['category_trends']['Gym']['total_minutes'] == 15
+
+    # A write the cache never saw (e.g. another worker) is picked up on the next read
+    with app_module.app.app_context():
+        app_module.insert_activities(user_id, [
+            {'title': 'Elsewhere', 'category': 'Study', 'minutes': 20, 'date': datetime(2025, 6, 10).date()}
+        ])
+        app_module.db.session.commit()
+    assert analytics(client, auth)['total_minutes'] == 65
+
+
+def test_analytics_cache_drops_entry_rebuilt_after_the_write(client, auth, app_module, today):
+    log(client, auth, '2025-06-09')
+    with app_module.app.app_context():
+        user_id = app_module.User.query.filter_by(username='alice').one().id
+        fields = {'title': 'Work', 'category': 'Study', 'minutes': 10, 'date': datetime(2025, 6, 10).date()}
+        app_module.db.session.add(app_module.Activity(user_id=user_id, **fields))
+        app_module.update_rollup(user_id, [fields])
+        seq = app_module.bump_change_seq(user_id)
+        app_module.db.session.commit()
+
+        # Another request rebuilds from the database before this write applies its row
+        app_module.analytics_cache.get(user_id)
+        app_module.analytics_cache.record(user_id, [fields], seq)
+        assert user_id not in app_module.analytics_cache.entries
+
+    assert analytics(client, auth)['total_minutes'] == 40
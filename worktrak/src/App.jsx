@@ -115,6 +115,26 @@ function App() {
     }
   };
 
+  // Fetch only activities created since the newest one we already have
+  const fetchLogChanges = async () => {
+    let since = logs.reduce((max, log) => Math.max(max, log.id), 0);
+    let fetched = [];
+    let hasMore = true;
+
+    while (hasMore) {
+      const data = await apiCall(`/logs/changes?since=${since}`);
+      fetched = fetched.concat(data.logs || []);
+      since = data.cursor;
+      hasMore = data.has_more;
+    }
+
+    if (fetched.length > 0) {
+      setLogs(prev => [...fetched, ...prev].sort(
+        (a, b) => b.date.localeCompare(a.date) || b.id - a.id
+      ));
+    }
+  };
+
   const handleSubmit = async (e) => {
     e.preventDefault();
     setLoading(true);
@@ -133,7 +153,7 @@ function App() {
       });
 
       setSuccessMessage('Activity logged successfully!');
-      await fetchLogs(); // Refresh logs after successful submission
+      await fetchLogChanges(); // Pull in just the new activity after submission
       
       // Reset form
       setTitle('');